@@ -1,24 +1,158 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db.models.functions import Substr
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.text import Truncator
 
+from .constants import ADMIN_INLINE_LIMIT, ADMIN_TEXT_PREVIEW
 from .models import Category, Location, Post, Comment
+from .paginators import EstimatedCountPaginator
 
 
-class PostInline(admin.StackedInline):
+def preview(text) -> str:
+    """Начало длинного текста для колонок списка."""
+    return Truncator(text).chars(ADMIN_TEXT_PREVIEW)
+
+
+def changelist_link(model, lookup: str, obj, title: str) -> str:
+    """Ссылка на список объектов model, отфильтрованный по obj."""
+    if obj.pk is None:
+        return admin.site.empty_value_display
+    url = reverse(
+        f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist'
+    )
+    return format_html('<a href="{}?{}={}">{}</a>', url, lookup, obj.pk, title)
+
+
+class LimitedInlineFormSet(BaseInlineFormSet):
+    """Формсет инлайна, показывающий только ADMIN_INLINE_LIMIT строк."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not queryset.query.is_sliced:
+            queryset = self._queryset = queryset[:ADMIN_INLINE_LIMIT]
+        return queryset
+
+
+class ReadOnlyInlineMixin:
+    """
+    Миксина - инлайн только для просмотра последних объектов.
+    Полный список открывается ссылкой на отфильтрованный changelist,
+    а не тысячами форм на странице родителя.
+    """
+
+    formset = LimitedInlineFormSet
+    extra = 0
+    max_num = 0
+    can_delete = False
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class PostInline(ReadOnlyInlineMixin, admin.TabularInline):
     model = Post
+    fields = readonly_fields = (
+        'title',
+        'pub_date',
+        'author',
+        'is_published',
+    )
+    verbose_name_plural = (
+        f'Последние {ADMIN_INLINE_LIMIT} публикаций'
+    )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author'
+        ).defer('text')
 
-class CommentInline(admin.StackedInline):
+
+class CommentInline(ReadOnlyInlineMixin, admin.TabularInline):
     model = Comment
+    fields = readonly_fields = (
+        'short_text',
+        'author',
+        'created_at',
+    )
+    verbose_name_plural = (
+        f'Первые {ADMIN_INLINE_LIMIT} комментариев'
+    )
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('author')
+
+    @admin.display(description='Текст')
+    def short_text(self, obj):
+        return preview(obj.text)
+
+
+class PreviewChangeList(ChangeList):
+    """
+    Список, в который длинные поля попадают только началом:
+    text заменяется подстрокой text_preview, а поля из
+    list_deferred_fields админки не загружаются вовсе.
+    """
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(
+            *self.model_admin.list_deferred_fields
+        ).annotate(
+            text_preview=Substr('text', 1, ADMIN_TEXT_PREVIEW + 1)
+        )
+
+
+class LargeTableAdminMixin:
+    """
+    Миксина - список большой таблицы без двух COUNT(*) на страницу:
+    число строк без фильтров оценивается, полный счётчик не выводится.
+    Длинный текст в список попадает только началом.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_deferred_fields: tuple = ('text',)
+
+    def get_changelist(self, request, **kwargs):
+        return PreviewChangeList
+
+    @admin.display(description='Текст')
+    def short_text(self, obj):
+        return preview(obj.text_preview)
+
+
+class ChoicesCacheMixin:
+    """
+    Миксина - варианты выбора небольших справочников в list_editable
+    считаются один раз при сборке формы: строки changelist получают
+    копию готового списка, а не запрос к базе на каждую строку.
+    """
+
+    cached_choice_fields: tuple = ()
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
+        if db_field.name in self.cached_choice_fields:
+            formfield.choices = list(formfield.choices)
+        return formfield
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(ChoicesCacheMixin, LargeTableAdminMixin, admin.ModelAdmin):
     inlines = (
         CommentInline,
     )
     list_display = (
         'title',
-        'text',
+        'short_text',
         'pub_date',
         'author',
         'location',
@@ -32,10 +166,24 @@ class PostAdmin(admin.ModelAdmin):
         'location',
         'pub_date',
     )
+    list_select_related = ('author', 'location', 'category')
+    # Каждая строка списка - форма из четырёх полей, держим страницу
+    # поменьше стандартных 100 строк.
+    list_per_page = 50
+    cached_choice_fields = ('category', 'location')
+    autocomplete_fields = ('author',)
+    readonly_fields = ('comments_link',)
     search_fields = ('title',)
     list_filter = ('category',)
     list_display_links = ('title',)
 
+    @admin.display(description='Комментарии')
+    def comments_link(self, obj):
+        return changelist_link(
+            Comment, 'post__id__exact', obj,
+            f'Все комментарии ({obj.comment_count})'
+        )
+
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -54,10 +202,17 @@ class CategoryAdmin(admin.ModelAdmin):
         'slug',
         'description',
     )
+    readonly_fields = ('posts_link',)
     search_fields = ('title',)
     list_filter = ('slug',)
     list_display_links = ('title',)
 
+    @admin.display(description='Публикации')
+    def posts_link(self, obj):
+        return changelist_link(
+            Post, 'category__id__exact', obj, 'Все публикации категории'
+        )
+
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
@@ -72,11 +227,18 @@ class LocationAdmin(admin.ModelAdmin):
     list_editable = (
         'is_published',
     )
+    readonly_fields = ('posts_link',)
     search_fields = ('name',)
 
+    @admin.display(description='Публикации')
+    def posts_link(self, obj):
+        return changelist_link(
+            Post, 'location__id__exact', obj, 'Все публикации локации'
+        )
+
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         'post',
         'text',
@@ -86,6 +248,11 @@ class CommentAdmin(admin.ModelAdmin):
     list_editable = (
         'text',
     )
+    list_select_related = ('post', 'author')
+    # Текст комментария правится прямо в списке и нужен целиком,
+    # откладываем только текст поста.
+    list_deferred_fields = ('post__text',)
+    autocomplete_fields = ('post', 'author')
     search_fields = ('text',)
 
 
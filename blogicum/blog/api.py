@@ -0,0 +1,271 @@
+from abc import ABCMeta, abstractmethod
+from http import HTTPStatus
+
+from django.db.models import F
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views import View
+
+from .cache import cached_page_response, get_cached_page, store_page
+from .constants import COMMENTS_PAGE_SIZE, PAGINATION_COUNT
+from .models import Category, Post, User
+from .paginators import KeysetPaginator
+
+
+class ApiError(Exception):
+    """Ошибка запроса к API, отдаётся клиенту со статусом 400."""
+
+
+class ApiView(View, metaclass=ABCMeta):
+    """
+    Базовый класс API только для чтения, наследники задают get_data().
+    Ответы сохраняются в кэше pages с теми же тегами, что и HTML,
+    поэтому сбрасываются теми же сигналами, отдаются с ETag
+    и отвечают 304 без обращения к базе.
+    """
+
+    # Поля ответа: имя в API -> путь для QuerySet.values().
+    fields: dict = {}
+    # Поля, которые отдаются, если параметр fields не передан.
+    default_fields: tuple = ()
+
+    def get_fields(self) -> dict:
+        """Разбирает ?fields=a,b и возвращает {имя в API: путь ORM}."""
+        requested = self.request.GET.get('fields')
+        names = (
+            [name.strip() for name in requested.split(',') if name.strip()]
+            if requested else list(self.default_fields)
+        )
+        unknown = set(names) - self.fields.keys()
+        if unknown:
+            raise ApiError(
+                'Неизвестные поля: ' + ', '.join(sorted(unknown))
+            )
+        return {name: self.fields[name] for name in names}
+
+    @staticmethod
+    def column(name: str, path: str) -> str:
+        """
+        Имя колонки в строке values(). Поля через связи выбираются
+        под псевдонимом: имя author заняло бы само поле модели.
+        """
+        return name if name == path else f'api_{name}'
+
+    def project(self, queryset, fields: dict, *required):
+        """
+        Выбирает из базы только запрошенные поля и служебные
+        required, нужные для курсора и тегов кэша.
+        """
+        plain = [name for name, path in fields.items() if name == path]
+        aliases = {
+            self.column(name, path): F(path)
+            for name, path in fields.items() if name != path
+        }
+        return queryset.values(*dict.fromkeys([*required, *plain]), **aliases)
+
+    @abstractmethod
+    def get_data(self) -> tuple:
+        """Возвращает пару (данные ответа, теги кэша)."""
+
+    def get(self, request, *args, **kwargs):
+        entry = get_cached_page(request)
+        if entry is not None:
+            return cached_page_response(request, entry)
+        try:
+            data, tags = self.get_data()
+        except ApiError as error:
+            return JsonResponse(
+                {'detail': str(error)}, status=HTTPStatus.BAD_REQUEST
+            )
+        except Http404 as error:
+            return JsonResponse(
+                {'detail': str(error) or 'Не найдено.'},
+                status=HTTPStatus.NOT_FOUND
+            )
+        response = JsonResponse(
+            data, json_dumps_params={'ensure_ascii': False}
+        )
+        # Клиент мог получить то же содержимое до сброса кэша -
+        # тогда ему тоже достаточно 304.
+        return cached_page_response(
+            request, store_page(request, response, tags)
+        )
+
+    def format_row(self, row: dict, fields: dict) -> dict:
+        """Оставляет в строке только запрошенные поля под именами API."""
+        return {
+            name: row[self.column(name, path)]
+            for name, path in fields.items()
+        }
+
+    def paginate(self, queryset, fields, per_page, date_field,
+                 required=(), **kwargs):
+        """
+        Курсорная страница из QuerySet.values().
+        Возвращает словарь ответа и исходные строки страницы.
+        """
+        paginator = KeysetPaginator(
+            self.project(queryset, fields, 'id', date_field, *required),
+            per_page, date_field=date_field, **kwargs
+        )
+        page = paginator.get_page(self.request.GET.get('cursor'))
+        return {
+            'results': [self.format_row(row, fields) for row in page],
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
+        }, list(page)
+
+
+class PostApiMixin:
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author__username',
+        'author_id': 'author_id',
+        'category': 'category__slug',
+        'category_id': 'category_id',
+        'location': 'location__name',
+        'location_id': 'location_id',
+        'comment_count': 'comment_count',
+        'image': 'image',
+    }
+    default_fields = (
+        'id', 'title', 'pub_date', 'author', 'category', 'comment_count'
+    )
+
+    # Всегда выбираются для тегов кэша, даже если не запрошены.
+    tag_fields = ('author_id', 'category_id', 'location_id')
+
+    def format_row(self, row: dict, fields: dict) -> dict:
+        data = super().format_row(row, fields)
+        if 'image' in data:
+            data['image'] = (
+                Post.image.field.storage.url(data['image'])
+                if data['image'] else None
+            )
+        return data
+
+    def post_tags(self, row: dict) -> set:
+        """Теги кэша строки поста, как post_cache_tags для модели."""
+        tags = {f'post:{row["id"]}', f'author:{row["author_id"]}'}
+        if row['category_id']:
+            tags.add(f'category:{row["category_id"]}')
+        if row['location_id']:
+            tags.add(f'location:{row["location_id"]}')
+        return tags
+
+
+class PostListApiView(PostApiMixin, ApiView):
+    """
+    Лента опубликованных постов: ?category=<slug>, ?author=<username>,
+    ?fields=..., ?cursor=...
+    """
+
+    def get_data(self):
+        posts = Post.objects.is_category_published()
+        tags = {'feed:index'}
+        if 'category' in self.request.GET:
+            category = get_object_or_404(
+                Category, slug=self.request.GET['category'],
+                is_published=True
+            )
+            posts = posts.filter(category=category)
+            tags.add(f'feed:category:{category.pk}')
+        if 'author' in self.request.GET:
+            posts = posts.filter(author__username=self.request.GET['author'])
+        data, rows = self.paginate(
+            posts, self.get_fields(), PAGINATION_COUNT, 'pub_date',
+            required=self.tag_fields
+        )
+        for row in rows:
+            tags |= self.post_tags(row)
+        return data, tags
+
+
+class PostDetailApiView(PostApiMixin, ApiView):
+    """Отдельный опубликованный пост."""
+
+    default_fields = tuple(PostApiMixin.fields)
+
+    def get_data(self):
+        fields = self.get_fields()
+        row = self.project(
+            Post.objects.is_category_published().filter(
+                pk=self.kwargs['post_id']
+            ),
+            fields, 'id', *self.tag_fields
+        ).first()
+        if row is None:
+            raise Http404('Публикация не найдена')
+        return self.format_row(row, fields), self.post_tags(row)
+
+
+class CommentListApiView(ApiView):
+    """Комментарии опубликованного поста от старых к новым."""
+
+    fields = {
+        'id': 'id',
+        'text': 'text',
+        'created_at': 'created_at',
+        'author': 'author__username',
+        'author_id': 'author_id',
+    }
+    default_fields = ('id', 'text', 'created_at', 'author')
+
+    def get_data(self):
+        post = get_object_or_404(
+            Post.objects.is_category_published().only('id'),
+            pk=self.kwargs['post_id']
+        )
+        data, rows = self.paginate(
+            post.comments.all(), self.get_fields(), COMMENTS_PAGE_SIZE,
+            'created_at', descending=False, required=('author_id',)
+        )
+        # Имя автора комментария меняется вместе с профилем.
+        return data, {f'post:{post.pk}'} | {
+            f'author:{row["author_id"]}' for row in rows
+        }
+
+
+class CategoryListApiView(ApiView):
+    """Опубликованные категории."""
+
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'description': 'description',
+    }
+    default_fields = ('id', 'title', 'slug')
+
+    def get_data(self):
+        rows = list(self.project(
+            Category.objects.filter(is_published=True), self.get_fields(),
+        ))
+        # Любое сохранение категории сбрасывает тег categories.
+        return {'results': rows}, {'categories'}
+
+
+class ProfileApiView(ApiView):
+    """Публичные данные профиля; посты автора - /api/posts/?author=."""
+
+    fields = {
+        'id': 'id',
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'date_joined': 'date_joined',
+    }
+    default_fields = tuple(fields)
+
+    def get_data(self):
+        fields = self.get_fields()
+        row = self.project(
+            User.objects.filter(username=self.kwargs['username']),
+            fields, 'id'
+        ).first()
+        if row is None:
+            raise Http404('Пользователь не найден')
+        return self.format_row(row, fields), {f'author:{row["id"]}'}
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from . import async_views, urls
+
+app_name = 'blog'
+
+# Маршруты чтения, которые под ASGI обслуживают async-представления.
+ASYNC_ROUTES: dict = {
+    'index': async_views.index,
+    'post_detail': async_views.post_detail,
+    'category_posts': async_views.category_posts,
+    'profile': async_views.profile,
+}
+
+urlpatterns: list = [
+    path(str(route.pattern), ASYNC_ROUTES[route.name], name=route.name)
+    if route.name in ASYNC_ROUTES else route
+    for route in urls.urlpatterns
+]
@@ -0,0 +1,47 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from . import metrics, views
+
+
+def async_read_view(view_class):
+    """
+    Async-вариант CBV чтения для запуска под ASGI.
+    В Django 3.2 нет асинхронного ORM и кэша, поэтому вся работа -
+    чтение кэша pages, запросы к базе и рендер шаблона - выполняется
+    одним переходом в пул потоков. Цикл событий не ждёт ни базу,
+    ни кэш, медленный запрос не задерживает остальные соединения.
+    """
+    view = view_class.as_view()
+
+    def render(request, *args, **kwargs):
+        metrics.instrument_caches()
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                started = time.perf_counter()
+                response.render()
+                metrics.add_template_time(time.perf_counter() - started)
+            return response
+        finally:
+            # Соединения потоков пула не закрываются сигналом
+            # request_finished - соблюдаем CONN_MAX_AGE вручную.
+            close_old_connections()
+
+    render_in_thread = sync_to_async(render, thread_sensitive=False)
+
+    async def async_view(request, *args, **kwargs):
+        return await render_in_thread(request, *args, **kwargs)
+
+    async_view.view_class = view_class
+    async_view.__doc__ = view_class.__doc__
+    async_view.__name__ = view_class.__name__
+    return async_view
+
+
+index = async_read_view(views.PostListView)
+post_detail = async_read_view(views.PostDetailView)
+category_posts = async_read_view(views.CategoryListView)
+profile = async_read_view(views.UserDetailView)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+from .constants import USER_CACHE_TIMEOUT
+
+
+def user_cache_key(user_id) -> str:
+    return f'auth:user:{user_id}'
+
+
+def forget_user(user_id) -> None:
+    """Удаляет пользователя из кэша, signals.py вызывает при записи."""
+    caches[settings.SESSION_CACHE_ALIAS].delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который достаёт пользователя сессии из кэша
+    sessions: залогиненный запрос не делает SELECT из auth_user.
+    Хеш пароля для проверки сессии берётся из закэшированного
+    объекта, поэтому запись сбрасывается при каждом сохранении
+    и удалении пользователя.
+    """
+
+    def get_user(self, user_id):
+        cache = caches[settings.SESSION_CACHE_ALIAS]
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
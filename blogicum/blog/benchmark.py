@@ -0,0 +1,87 @@
+import time
+from importlib import import_module
+from types import ModuleType
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+
+from .models import Comment, Post
+
+
+def sample_urls():
+    """
+    Подбирает по объекту для каждого маршрута из blog/urls.py.
+    Возвращает автора выбранного поста и словарь {имя: URL};
+    маршруты, для которых нет объектов, пропускаются.
+    """
+    post = Post.objects.is_category_published().select_related(
+        'author', 'category'
+    ).order_by('-comment_count', '-pub_date').first()
+    if post is None:
+        return None, {}
+    comment = Comment.objects.filter(post=post).first()
+    author = post.author.username
+    urls = {
+        'blog:index': reverse('blog:index'),
+        'blog:post_detail': reverse('blog:post_detail', args=[post.pk]),
+        'blog:post_comments': reverse(
+            'blog:post_comments', args=[post.pk]
+        ),
+        'blog:category_posts': reverse(
+            'blog:category_posts', args=[post.category.slug]
+        ),
+        'blog:profile': reverse('blog:profile', args=[author]),
+        'blog:search': reverse('blog:search') + '?q=' + (
+            post.title.split() or ['']
+        )[0],
+        'blog:metrics': reverse('blog:metrics'),
+        'blog:create_post': reverse('blog:create_post'),
+        'blog:edit_post': reverse('blog:edit_post', args=[post.pk]),
+        'blog:delete_post': reverse('blog:delete_post', args=[post.pk]),
+        'blog:add_comment': reverse('blog:add_comment', args=[post.pk]),
+        'blog:edit_profile': reverse('blog:edit_profile', args=[author]),
+    }
+    if comment is not None:
+        urls['blog:edit_comment'] = reverse(
+            'blog:edit_comment', args=[post.pk, comment.pk]
+        )
+        urls['blog:delete_comment'] = reverse(
+            'blog:delete_comment', args=[post.pk, comment.pk]
+        )
+    return post.author, urls
+
+
+def measure(client, url):
+    """Выполняет GET и возвращает (секунды, число SQL-запросов)."""
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        client.get(url)
+        elapsed = time.perf_counter() - started
+    return elapsed, len(queries)
+
+
+def percentile(values, percent) -> float:
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(0, round(percent / 100 * len(ordered) + 0.5) - 1)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def read_urlconf(use_async: bool):
+    """
+    Корневой URLconf проекта с блогом на sync- или async-представлениях
+    чтения - для override_settings(ROOT_URLCONF=...) в замерах.
+    """
+    root = import_module(settings.ROOT_URLCONF)
+    blog = path('', include(
+        'blog.async_urls' if use_async else 'blog.urls', namespace='blog'
+    ))
+    urlconf = ModuleType(f'{root.__name__}_{"async" if use_async else "sync"}')
+    urlconf.__dict__.update(vars(root))
+    urlconf.urlpatterns = [
+        blog if getattr(route, 'namespace', None) == 'blog' else route
+        for route in root.urlpatterns
+    ]
+    return urlconf
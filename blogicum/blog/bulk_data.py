@@ -0,0 +1,221 @@
+import json
+from collections import Counter
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+
+from .constants import FIXTURE_READ_CHUNK
+
+JSON_WHITESPACE = ' \t\n\r'
+
+
+class _ChunkedBuffer:
+    """Буфер над файлом: держит в памяти только недочитанный хвост."""
+
+    def __init__(self, stream, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def read_more(self) -> None:
+        """Отбрасывает разобранное начало буфера и дочитывает кусок."""
+        if self.eof:
+            raise ValueError('Фикстура оборвалась.')
+        chunk = self.stream.read(self.chunk_size)
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        self.eof = not chunk
+
+    def next_char(self) -> str:
+        """Следующий значимый символ; позиция остаётся на нём."""
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in JSON_WHITESPACE
+            ):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            self.read_more()
+
+    def take_char(self) -> str:
+        char = self.next_char()
+        self.position += 1
+        return char
+
+    def decode(self):
+        """Разбирает следующее JSON-значение, дочитывая файл при нужде."""
+        self.next_char()
+        while True:
+            try:
+                value, self.position = self.decoder.raw_decode(
+                    self.buffer, self.position
+                )
+                return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self.read_more()
+
+
+def iter_fixture(stream, chunk_size: int = FIXTURE_READ_CHUNK):
+    """
+    Перебирает объекты JSON-массива фикстуры, читая файл кусками:
+    в памяти лежит один кусок и разбираемый объект, а не весь файл.
+    """
+    buffer = _ChunkedBuffer(stream, chunk_size)
+    if buffer.take_char() != '[':
+        raise ValueError('Фикстура должна быть JSON-массивом.')
+    if buffer.next_char() == ']':
+        return
+    while True:
+        yield buffer.decode()
+        char = buffer.take_char()
+        if char == ']':
+            return
+        if char != ',':
+            raise ValueError(f'Ожидалась запятая, а не {char!r}.')
+
+
+def _save_m2m(deserialized, using) -> None:
+    """Связи многие-ко-многим пачкой строк промежуточных таблиц."""
+    rows = {}
+    for item in deserialized:
+        opts = item.object._meta
+        for name, values in (item.m2m_data or {}).items():
+            field = opts.get_field(name)
+            through = field.remote_field.through
+            source = f'{field.m2m_field_name()}_id'
+            target = f'{field.m2m_reverse_field_name()}_id'
+            rows.setdefault(through, []).extend(
+                through(**{source: item.object.pk, target: value})
+                for value in values
+            )
+    for through, objects in rows.items():
+        through._base_manager.using(using).bulk_create(
+            objects, ignore_conflicts=True
+        )
+
+
+def load_fixture(objects, batch_size: int, using: str,
+                 ignore_conflicts: bool = False, report=None) -> Counter:
+    """
+    Загружает объекты фикстуры через bulk_create пачками по batch_size
+    в одной транзакции. Проверка внешних ключей отложена до конца
+    загрузки, как в loaddata, поэтому порядок моделей в файле не важен;
+    она выполняется до COMMIT, и при нарушении не остаётся ни одной
+    загруженной строки. Сигналы моделей не отправляются.
+    report(model, count) вызывается после каждой пачки.
+    Возвращает число строк по моделям.
+    """
+    connection = connections[using]
+    counts = Counter()
+    with transaction.atomic(using=using):
+        with connection.constraint_checks_disabled():
+            for label, batch in _chunks(objects, batch_size):
+                model = apps.get_model(label)
+                deserialized = list(
+                    serializers.deserialize('python', batch, using=using)
+                )
+                model._base_manager.using(using).bulk_create(
+                    [item.object for item in deserialized],
+                    ignore_conflicts=ignore_conflicts,
+                )
+                _save_m2m(deserialized, using)
+                counts[model] += len(batch)
+                if report is not None:
+                    report(model, len(batch))
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in counts]
+        )
+        # Явные pk в PostgreSQL не двигают последовательности.
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), counts)
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+    return counts
+
+
+def _chunks(objects, batch_size: int):
+    """
+    Режет поток объектов на пачки одной модели:
+    (метка модели, [объекты]) длиной не больше batch_size.
+    """
+    label, batch = None, []
+    for obj in objects:
+        if obj['model'] != label or len(batch) >= batch_size:
+            if batch:
+                yield label, batch
+            label, batch = obj['model'], []
+        batch.append(obj)
+    if batch:
+        yield label, batch
+
+
+def resolve_models(labels) -> list:
+    """
+    Модели по меткам app_label или app_label.Model в порядке
+    зависимостей; без меток - все модели проекта.
+    """
+    app_list = {}
+    for label in labels or [config.label for config in apps.get_app_configs()]:
+        if '.' in label:
+            model = apps.get_model(label)
+            app_list.setdefault(model._meta.app_config, []).append(model)
+        else:
+            config = apps.get_app_config(label)
+            app_list.setdefault(config, []).extend(config.get_models())
+    return [
+        model
+        for model in serializers.sort_dependencies(app_list.items())
+        if model._meta.managed and not model._meta.proxy
+    ]
+
+
+def dump_fixture(models, stream, batch_size: int, using: str,
+                 report=None) -> Counter:
+    """
+    Пишет объекты моделей в stream в формате фикстуры dumpdata,
+    читая таблицы итератором пачками по batch_size.
+    """
+    counts = Counter()
+    stream.write('[')
+    first = True
+    for model in models:
+        queryset = model._default_manager.using(using).order_by(
+            model._meta.pk.name
+        )
+        batch = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) < batch_size:
+                continue
+            first = _write_batch(stream, batch, first)
+            counts[model] += len(batch)
+            if report is not None:
+                report(model, len(batch))
+            batch = []
+        if batch:
+            first = _write_batch(stream, batch, first)
+            counts[model] += len(batch)
+            if report is not None:
+                report(model, len(batch))
+    stream.write('\n]\n')
+    return counts
+
+
+def _write_batch(stream, batch, first: bool) -> bool:
+    for item in serializers.serialize('python', batch):
+        stream.write('\n' if first else ',\n')
+        stream.write(
+            json.dumps(item, cls=DjangoJSONEncoder, ensure_ascii=False)
+        )
+        first = False
+    return first
@@ -0,0 +1,206 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.core.cache.utils import make_template_fragment_key
+from django.utils import timezone
+
+from .constants import PAGE_CACHE_TIMEOUT, REPLICA_STICKY_SECONDS
+from .models import Post
+
+# Имя фрагмента и алиас кэша из {% cache %} в includes/post_card.html.
+POST_CARD_FRAGMENT = 'post_card'
+FRAGMENT_CACHE_ALIAS = 'fragments'
+# Алиас кэша целых страниц для анонимных пользователей.
+PAGE_CACHE_ALIAS = 'pages'
+NEXT_PUBLICATION_KEY = 'pagecache:next_publication'
+
+
+def post_card_key(post_id, updated_at) -> str:
+    """Ключ кэша карточки поста - тот же, что строит тег {% cache %}."""
+    return make_template_fragment_key(
+        POST_CARD_FRAGMENT, [post_id, updated_at]
+    )
+
+
+def invalidate_post_card(post) -> None:
+    """Удаляет из кэша карточку поста по значениям экземпляра."""
+    caches[FRAGMENT_CACHE_ALIAS].delete(
+        post_card_key(post.pk, post.updated_at)
+    )
+
+
+def invalidate_post_cards(posts) -> None:
+    """Удаляет из кэша карточки переданных постов (QuerySet)."""
+    keys = [
+        post_card_key(pk, updated_at)
+        for pk, updated_at in posts.values_list('pk', 'updated_at')
+    ]
+    if keys:
+        caches[FRAGMENT_CACHE_ALIAS].delete_many(keys)
+
+
+def post_cache_tags(post) -> set:
+    """
+    Теги страницы, на которой выведен пост: сам пост, его автор,
+    категория и локация - всё, что попадает в разметку карточки.
+    """
+    tags = {f'post:{post.pk}', f'author:{post.author_id}'}
+    if post.category_id:
+        tags.add(f'category:{post.category_id}')
+    if post.location_id:
+        tags.add(f'location:{post.location_id}')
+    return tags
+
+
+def _tag_key(tag: str) -> str:
+    return f'pagecache:tag:{tag}'
+
+
+def _page_key(request) -> str:
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'pagecache:page:{path}'
+
+
+def _new_version() -> str:
+    """Версия тега: время сброса и случайная часть."""
+    return f'{int(time.time())}:{uuid.uuid4().hex}'
+
+
+def _purged_at(version: str) -> int:
+    stamp, separator, _ = version.partition(':')
+    # Версии старого формата - просто uuid, время сброса неизвестно.
+    return int(stamp) if separator else 0
+
+
+def purge_pages(*tags) -> None:
+    """
+    Сбрасывает все страницы, помеченные любым из тегов.
+    Тегу присваивается новая версия, и страницы, сохранённые
+    со старой версией, при чтении считаются устаревшими.
+    """
+    caches[PAGE_CACHE_ALIAS].set_many(
+        {_tag_key(tag): _new_version() for tag in tags}, None
+    )
+
+
+def purge_pages_on_commit(*tags) -> None:
+    """
+    purge_pages после фиксации текущей транзакции. Сброс до COMMIT
+    даёт параллельному запросу сохранить старые строки уже под
+    новой версией тега, и страница устаревает до конца таймаута.
+    Вне транзакции теги сбрасываются сразу.
+    """
+    transaction.on_commit(lambda: purge_pages(*tags))
+
+
+def forget_next_publication() -> None:
+    """Сбрасывает запомненное время ближайшей отложенной публикации."""
+    caches[PAGE_CACHE_ALIAS].delete(NEXT_PUBLICATION_KEY)
+
+
+def page_cache_timeout() -> int:
+    """
+    Страницу можно хранить до ближайшей отложенной публикации:
+    раньше состав лент измениться не может.
+    """
+    cache = caches[PAGE_CACHE_ALIAS]
+    next_publication = cache.get(NEXT_PUBLICATION_KEY)
+    if next_publication is None:
+        next_publication = Post.objects.next_publication_date() or False
+        cache.set(NEXT_PUBLICATION_KEY, next_publication, PAGE_CACHE_TIMEOUT)
+    if not next_publication:
+        return PAGE_CACHE_TIMEOUT
+    seconds = (next_publication - timezone.now()).total_seconds()
+    return max(1, min(PAGE_CACHE_TIMEOUT, int(seconds)))
+
+
+def get_cached_page(request):
+    """Возвращает сохранённую страницу, если ни один её тег не сброшен."""
+    cache = caches[PAGE_CACHE_ALIAS]
+    entry = cache.get(_page_key(request))
+    if entry is None:
+        return None
+    versions = cache.get_many([_tag_key(tag) for tag in entry['tags']])
+    for tag, version in entry['tags'].items():
+        if versions.get(_tag_key(tag)) != version:
+            return None
+    return entry
+
+
+def _tag_versions(cache, keys) -> dict:
+    """Текущие версии тегов по ключам; недостающие создаются."""
+    versions = cache.get_many(keys)
+    for key in keys - versions.keys():
+        # add() не перезапишет версию, выставленную параллельным сбросом.
+        cache.add(key, _new_version(), None)
+        versions[key] = cache.get(key)
+    return versions
+
+
+def store_page(request, response, tags) -> dict:
+    """Сохраняет отрендеренную страницу вместе с текущими версиями тегов."""
+    cache = caches[PAGE_CACHE_ALIAS]
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = _tag_versions(cache, keys.keys())
+    entry = {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'etag': '"%s"' % hashlib.md5(response.content).hexdigest(),
+        'last_modified': int(time.time()),
+        'tags': {tag: versions[key] for key, tag in keys.items()},
+    }
+    timeout = page_cache_timeout()
+    if settings.DATABASE_REPLICAS and time.time() - max(
+        map(_purged_at, versions.values()), default=0
+    ) < REPLICA_STICKY_SECONDS:
+        # Тег только что сброшен, а страница могла быть собрана
+        # по реплике, ещё не получившей изменение: храним недолго.
+        timeout = min(timeout, REPLICA_STICKY_SECONDS)
+    cache.set(_page_key(request), entry, timeout)
+    return entry
+
+
+def cached_count(queryset, tags) -> int:
+    """
+    COUNT(*) выборки из кэша pages. Версии тегов входят в ключ,
+    поэтому сброс любого из них сам даёт новый подсчёт.
+    """
+    cache = caches[PAGE_CACHE_ALIAS]
+    versions = _tag_versions(cache, {_tag_key(tag) for tag in tags})
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(
+        repr((sql, params, sorted(versions.items()))).encode()
+    ).hexdigest()
+    key = f'pagecache:count:{digest}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, PAGE_CACHE_TIMEOUT)
+    return count
+
+
+def add_cache_headers(response, entry):
+    """Проставляет ETag и Last-Modified сохранённой страницы."""
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    return response
+
+
+def cached_page_response(request, entry):
+    """
+    Ответ по сохранённой странице: 304, если у клиента
+    уже есть эта версия, иначе сама страница.
+    """
+    response = get_conditional_response(
+        request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified'],
+    ) or HttpResponse(entry['content'], content_type=entry['content_type'])
+    return add_cache_headers(response, entry)
@@ -0,0 +1,205 @@
+import atexit
+import logging
+import queue
+import threading
+
+from django.db import DatabaseError, close_old_connections, transaction
+
+from .constants import (
+    COMMENT_BUFFER_BATCH, COMMENT_BUFFER_DRAIN_WAIT, COMMENT_BUFFER_WAIT
+)
+from .models import Comment, Post
+from .signals import comments_created
+
+logger = logging.getLogger(__name__)
+
+
+# Метка в очереди: поток записи дописывает всё, что перед ней, и выходит.
+STOP = object()
+
+
+class PendingComment:
+    """Комментарий в очереди и событие его записи в базу."""
+
+    def __init__(self, comment: Comment):
+        self.comment = comment
+        self.saved = threading.Event()
+        self.error = None
+        self._lock = threading.Lock()
+        self._state = None
+
+    def take(self) -> bool:
+        """Поток записи забирает комментарий, если автор ещё ждёт."""
+        with self._lock:
+            self._state = self._state or 'taken'
+            return self._state == 'taken'
+
+    def cancel(self) -> bool:
+        """
+        Автор перестаёт ждать. True - комментарий не будет записан
+        очередью, False - поток уже пишет его пачку.
+        """
+        with self._lock:
+            self._state = self._state or 'cancelled'
+            return self._state == 'cancelled'
+
+
+def save_comments(comments: list) -> None:
+    """
+    Вставляет пачку комментариев одним bulk_create и сообщает
+    о ней сигналом comments_created. Вызывается в транзакции.
+    """
+    Comment.objects.bulk_create(comments)
+    if comments[0].pk is None:
+        # SQLite в Django 3.2 не возвращает id из bulk_create.
+        # Транзакция держит блокировку записи, поэтому последние
+        # len(comments) id - это наша пачка, в порядке вставки.
+        ids = Comment.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        )[:len(comments)]
+        for comment, pk in zip(comments, reversed(ids)):
+            comment.pk = pk
+    comments_created.send(sender=Comment, comments=comments)
+
+
+class CommentBuffer:
+    """
+    Очередь комментариев процесса и поток, который пишет их в базу.
+    Поток забирает всё, что накопилось, пока шла предыдущая запись:
+    при одиночных комментариях пачка из одного комментария пишется
+    сразу, при всплеске сотни комментариев уходят одной транзакцией
+    вместо сотен, стоящих в очереди к блокировке записи SQLite.
+    """
+
+    def __init__(self, batch_size: int = COMMENT_BUFFER_BATCH):
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_flusher(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='comment-flusher', daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, comment: Comment) -> PendingComment:
+        """Ставит проверенный формой комментарий в очередь записи."""
+        pending = PendingComment(comment)
+        self._ensure_flusher()
+        self.queue.put(pending)
+        return pending
+
+    def save(self, comment: Comment,
+             timeout: float = COMMENT_BUFFER_WAIT) -> bool:
+        """
+        Ставит комментарий в очередь и ждёт, пока его пачка
+        будет записана: после ответа автор сразу видит свой
+        комментарий. False - очередь не дошла до комментария за
+        timeout, он снят с очереди и его нужно сохранить самому.
+        Post.DoesNotExist - пост удалён, пока комментарий ждал.
+        """
+        pending = self.submit(comment)
+        if not pending.saved.wait(timeout):
+            if pending.cancel():
+                return False
+            # Пачка уже пишется - запись закончится за время транзакции.
+            pending.saved.wait()
+        if pending.error is not None:
+            raise pending.error
+        return True
+
+    def drain(self, timeout: float = COMMENT_BUFFER_DRAIN_WAIT) -> None:
+        """
+        Дописывает очередь при остановке процесса: поток записи -
+        демон и погиб бы вместе с ещё не записанными комментариями.
+        """
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self.queue.put(STOP)
+        thread.join(timeout)
+
+    def _take_batch(self) -> list:
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            stop = STOP in batch
+            batch = [
+                pending for pending in batch
+                if pending is not STOP and pending.take()
+            ]
+            try:
+                if batch:
+                    self.flush(batch)
+            except Exception as error:
+                # Поток не должен умирать: ошибку получают авторы пачки.
+                logger.exception('Ошибка записи комментариев.')
+                for pending in batch:
+                    pending.error = pending.error or error
+            finally:
+                for pending in batch:
+                    pending.saved.set()
+                close_old_connections()
+            if stop:
+                return
+
+    def flush(self, batch: list) -> None:
+        batch = self._skip_deleted_posts(batch)
+        if len(batch) > 1:
+            try:
+                with transaction.atomic():
+                    save_comments([pending.comment for pending in batch])
+                return
+            except DatabaseError:
+                for pending in batch:
+                    pending.comment.pk = None
+                logger.exception(
+                    'Пачка из %d комментариев не записана, пишем по одному.',
+                    len(batch)
+                )
+            # Пост могли удалить уже после проверки.
+            batch = self._skip_deleted_posts(batch)
+        # Ошибка одного комментария достаётся только его автору.
+        for pending in batch:
+            try:
+                with transaction.atomic():
+                    save_comments([pending.comment])
+            except DatabaseError as error:
+                pending.comment.pk = None
+                pending.error = error
+
+    @staticmethod
+    def _skip_deleted_posts(batch: list) -> list:
+        """
+        Убирает из пачки комментарии к постам, удалённым, пока они
+        ждали в очереди: их авторы получат 404, а не ошибку записи
+        всей пачки. Проверка идёт до транзакции записи - SELECT
+        перед INSERT в одной транзакции SQLite получил бы
+        "database is locked" после чужой записи.
+        """
+        post_ids = set(Post.objects.filter(
+            pk__in={pending.comment.post_id for pending in batch}
+        ).values_list('pk', flat=True))
+        kept = []
+        for pending in batch:
+            if pending.comment.post_id in post_ids:
+                kept.append(pending)
+            else:
+                pending.error = Post.DoesNotExist('Публикация удалена.')
+        return kept
+
+
+comment_buffer = CommentBuffer()
+atexit.register(comment_buffer.drain)
@@ -9,3 +9,75 @@ TEXT_WIDGET_SIZE: int = 10
 # Число объектов для пагинации,
 # используется в views.py
 PAGINATION_COUNT: int = 10
+
+# Наибольшее целое, которое принимают SQLite и bigint PostgreSQL:
+# числа из URL больше него до базы не доходят.
+MAX_DB_INTEGER: int = 2 ** 63 - 1
+
+# Последняя страница поиска (views.py): номер из URL больше неё
+# приводится к ней, OFFSET не выходит за пределы INTEGER SQLite.
+SEARCH_MAX_PAGE: int = 100
+
+# Сколько номеров страниц выводится по обе стороны от текущей,
+# используется в templatetags/pagination.py.
+PAGINATION_WINDOW: int = 3
+
+# Время жизни страницы в кэше анонимных страниц (в секундах),
+# используется в cache.py. Основная инвалидация - по тегам из signals.py.
+PAGE_CACHE_TIMEOUT: int = 60 * 60
+
+# Ширины уменьшенных копий Post.image: картинка выводится в блоке
+# 300px (css/img.css), отсюда копия 1x, 2x для retina и крупная
+# копия для детальной страницы. Используются в images.py.
+IMAGE_VARIANT_WIDTHS: tuple = (320, 640, 1280)
+IMAGE_VARIANT_QUALITY: int = 80
+# Число потоков, в которых готовятся копии изображений.
+IMAGE_WORKERS: int = 2
+
+# Число комментариев на одной порции под постом,
+# используется в views.py.
+COMMENTS_PAGE_SIZE: int = 50
+
+# Порог медленного запроса (в миллисекундах) и число самых долгих
+# SQL-запросов, которые пишутся в лог, используются в metrics.py.
+SLOW_REQUEST_MS: int = 500
+SLOW_REQUEST_TOP_QUERIES: int = 5
+
+# Сколько секунд после записи чтения пользователя идут в основную
+# базу, пока реплики догоняют её, и cookie с этим сроком.
+# Используются в routers.py.
+REPLICA_STICKY_SECONDS: int = 10
+REPLICA_STICKY_COOKIE: str = 'primary_until'
+
+# Размер куска (в символах), которым bulk_data.py читает фикстуру.
+FIXTURE_READ_CHUNK: int = 1 << 16
+
+# Админка больших таблиц (admin.py): длина превью текста в списках,
+# сколько строк показывают инлайны и с какого размера таблицы
+# число строк в списке оценивается, а не считается COUNT(*).
+ADMIN_TEXT_PREVIEW: int = 80
+ADMIN_INLINE_LIMIT: int = 20
+ADMIN_EXACT_COUNT_LIMIT: int = 10000
+
+# Статика (staticfiles.py): файлы с хешем в имени кэшируются навсегда,
+# без хеша - на STATIC_UNHASHED_MAX_AGE секунд. Сжатые копии .gz и .br
+# готовятся для текстовых форматов и сохраняются, только если
+# меньше оригинала хотя бы на STATIC_MIN_SAVING.
+STATIC_MAX_AGE: int = 365 * 24 * 60 * 60
+STATIC_UNHASHED_MAX_AGE: int = 60
+STATIC_COMPRESS_EXTENSIONS: tuple = (
+    '.css', '.js', '.map', '.svg', '.ico', '.txt', '.html', '.json', '.xml'
+)
+STATIC_MIN_SAVING: float = 0.05
+
+# Сколько секунд пользователь сессии хранится в кэше sessions,
+# используется в backends.py. Основная инвалидация - сигналами.
+USER_CACHE_TIMEOUT: int = 5 * 60
+
+# Буфер записи комментариев (comment_buffer.py): сколько комментариев
+# не больше вставляется одной транзакцией и сколько секунд запрос
+# ждёт записи своего комментария.
+COMMENT_BUFFER_BATCH: int = 500
+COMMENT_BUFFER_WAIT: float = 5.0
+# Сколько секунд процесс при остановке дописывает очередь комментариев.
+COMMENT_BUFFER_DRAIN_WAIT: float = 30.0
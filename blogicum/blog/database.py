@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import connections
+
+
+def configure_sqlite(connection) -> None:
+    """Выполняет SQLITE_PRAGMAS на новом соединении с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def check_connections() -> None:
+    """
+    Закрывает сохранённые между запросами соединения, которые
+    перестали отвечать (перезапуск базы, разрыв сети): иначе
+    первый запрос страницы упадёт на мёртвом соединении.
+    Новые соединения не проверяются - они открываются заново.
+    """
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
@@ -0,0 +1,151 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps, features
+
+from .cache import invalidate_post_cards, purge_pages_on_commit
+from .constants import (
+    IMAGE_VARIANT_QUALITY, IMAGE_VARIANT_WIDTHS, IMAGE_WORKERS
+)
+from .models import Post
+
+# WebP, если Pillow собран с его поддержкой, иначе JPEG.
+VARIANT_FORMAT, VARIANT_EXTENSION = (
+    ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+)
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=IMAGE_WORKERS, thread_name_prefix='image-variants'
+        )
+    return _executor
+
+
+def needs_variants(post) -> bool:
+    """Есть изображение, а копий для него ещё нет."""
+    return bool(post.image) and (
+        post.image_variants.get('source') != post.image.name
+    )
+
+
+def render_variants(image_field) -> list:
+    """
+    Сохраняет уменьшенные копии рядом с оригиналом.
+    Больше оригинала копии не делаются; если он уже меньше
+    самой маленькой ширины - делается одна пережатая копия.
+    """
+    storage = image_field.storage
+    stem = os.path.splitext(image_field.name)[0]
+    with storage.open(image_field.name) as file, Image.open(file) as image:
+        image = ImageOps.exif_transpose(image)
+        if VARIANT_FORMAT == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGB')
+        widths = [
+            width for width in IMAGE_VARIANT_WIDTHS if width < image.width
+        ] or [image.width]
+        variants = []
+        for width in widths:
+            copy = image.copy()
+            copy.thumbnail((width, image.height))
+            buffer = BytesIO()
+            copy.save(
+                buffer, VARIANT_FORMAT,
+                quality=IMAGE_VARIANT_QUALITY, optimize=True
+            )
+            name = storage.save(
+                f'{stem}_w{copy.width}.{VARIANT_EXTENSION}',
+                ContentFile(buffer.getvalue())
+            )
+            variants.append([copy.width, name])
+    return variants
+
+
+def delete_variants(storage, variants) -> None:
+    """Удаляет файлы копий [[ширина, имя], ...]."""
+    for _, name in variants:
+        # FileSystemStorage.delete молча пропускает отсутствующий файл.
+        storage.delete(name)
+
+
+def build_variants(post_id, force: bool = False) -> bool:
+    """
+    Готовит копии изображения поста и сбрасывает кэш его страниц.
+    Прежние копии удаляются. force - пересоздать готовые копии.
+    Непрочитанный оригинал пишется в лог, пост пропускается.
+    """
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'image_variants', 'updated_at'
+    ).first()
+    if post is None or not post.image or not (
+        force or needs_variants(post)
+    ):
+        return False
+    source = post.image.name
+    old_variants = post.image_variants.get('variants', [])
+    try:
+        variants = render_variants(post.image)
+    except OSError as error:
+        logger.warning(
+            'Копии изображения поста %s не созданы: %s', post_id, error
+        )
+        return False
+    # Если изображение успели заменить, копии устарели - не сохраняем.
+    updated = Post.objects.filter(pk=post_id, image=source).update(
+        image_variants={'source': source, 'variants': variants}
+    )
+    storage = post.image.storage
+    if not updated:
+        delete_variants(storage, variants)
+        return False
+    delete_variants(storage, [
+        variant for variant in old_variants if variant not in variants
+    ])
+    invalidate_post_cards(Post.objects.filter(pk=post_id))
+    purge_pages_on_commit(f'post:{post_id}')
+    return True
+
+
+def remove_variants(post) -> None:
+    """
+    Изображение убрано из поста или пост удалён: после коммита
+    удаляет файлы копий и очищает image_variants.
+    """
+    variants = post.image_variants.get('variants', [])
+    if not variants:
+        return
+    storage = Post._meta.get_field('image').storage
+    post_id = post.pk
+
+    def remove():
+        Post.objects.filter(pk=post_id, image='').update(image_variants={})
+        delete_variants(storage, variants)
+
+    transaction.on_commit(remove)
+
+
+def build_variants_in_thread(post_id, force: bool = False) -> bool:
+    """Обёртка build_variants для запуска в потоке пула."""
+    try:
+        return build_variants(post_id, force)
+    finally:
+        # У каждого потока пула своё соединение с БД.
+        connection.close()
+
+
+def schedule_variants(post) -> None:
+    """Ставит подготовку копий в фоновый пул после коммита транзакции."""
+    post_id = post.pk
+    transaction.on_commit(
+        lambda: get_executor().submit(build_variants_in_thread, post_id)
+    )
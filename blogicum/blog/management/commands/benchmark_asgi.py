@@ -0,0 +1,141 @@
+import asyncio
+import time
+from http import HTTPStatus
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import (
+    override_settings, setup_test_environment, teardown_test_environment
+)
+
+from blog.benchmark import percentile, read_urlconf, sample_urls
+
+# Маршруты, у которых есть async-вариант в blog/async_urls.py.
+READ_ROUTES = (
+    'blog:index', 'blog:post_detail', 'blog:category_posts', 'blog:profile'
+)
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает пропускную способность маршрутов чтения под WSGI
+    (sync-представления, пул потоков как у многопоточного сервера)
+    и под ASGI (async-представления, одновременные запросы в одном
+    цикле событий). Оба обработчика запускаются в процессе команды,
+    поэтому сеть и сам сервер в замер не входят.
+    """
+
+    help = 'Пропускная способность маршрутов чтения: ASGI против WSGI.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=20,
+            help='Число одновременных соединений.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на маршрут для каждого обработчика.'
+        )
+        parser.add_argument(
+            '--as-author', action='store_true',
+            help='Запрашивать от имени автора - мимо кэша страниц.'
+        )
+
+    def make_client(self, client_class, author, options):
+        client = client_class()
+        if options['as_author']:
+            client.force_login(author)
+        return client
+
+    def run_wsgi(self, url, author, options):
+        def worker(count):
+            client = self.make_client(Client, author, options)
+            timings = []
+            for _ in range(count):
+                started = time.perf_counter()
+                self.check_response(client.get(url), url)
+                timings.append(time.perf_counter() - started)
+            return timings
+
+        with override_settings(ROOT_URLCONF=read_urlconf(use_async=False)):
+            worker(1)
+            started = time.perf_counter()
+            with ThreadPoolExecutor(options['concurrency']) as executor:
+                results = executor.map(worker, self.split(options))
+                timings = [elapsed for chunk in results for elapsed in chunk]
+            return time.perf_counter() - started, timings
+
+    def run_asgi(self, url, author, options, use_async=True):
+        async def worker(client, count):
+            timings = []
+            for _ in range(count):
+                started = time.perf_counter()
+                self.check_response(await client.get(url), url)
+                timings.append(time.perf_counter() - started)
+            return timings
+
+        # force_login ходит в базу - клиентов готовим вне цикла событий.
+        clients = [
+            self.make_client(AsyncClient, author, options)
+            for _ in range(options['concurrency'])
+        ]
+
+        async def main():
+            await worker(clients[0], 1)
+            started = time.perf_counter()
+            results = await asyncio.gather(*(
+                worker(client, count)
+                for client, count in zip(clients, self.split(options))
+            ))
+            timings = [elapsed for chunk in results for elapsed in chunk]
+            return time.perf_counter() - started, timings
+
+        with override_settings(ROOT_URLCONF=read_urlconf(use_async)):
+            return asyncio.run(main())
+
+    def check_response(self, response, url):
+        if response.status_code != HTTPStatus.OK:
+            raise CommandError(f'{url}: ответ {response.status_code}')
+
+    def split(self, options) -> list:
+        """Делит запросы маршрута между соединениями."""
+        total, workers = options['requests'], options['concurrency']
+        return [
+            total // workers + (1 if index < total % workers else 0)
+            for index in range(workers)
+        ]
+
+    def report(self, name, handler, wall, timings):
+        milliseconds = [elapsed * 1000 for elapsed in timings]
+        self.stdout.write(
+            f'{name:<22} {handler:<10} {len(timings) / wall:>8.1f} зап/с  '
+            f'p50 {percentile(milliseconds, 50):>8.2f}  '
+            f'p95 {percentile(milliseconds, 95):>8.2f} мс'
+        )
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError(
+                'Нужны положительные --concurrency и --requests.'
+            )
+        setup_test_environment()
+        try:
+            author, urls = sample_urls()
+            if author is None:
+                raise CommandError('В базе нет опубликованных постов.')
+            for name in READ_ROUTES:
+                self.report(
+                    name, 'WSGI',
+                    *self.run_wsgi(urls[name], author, options)
+                )
+                self.report(
+                    name, 'ASGI',
+                    *self.run_asgi(urls[name], author, options, False)
+                )
+                self.report(
+                    name, 'ASGI+async',
+                    *self.run_asgi(urls[name], author, options)
+                )
+        finally:
+            teardown_test_environment()
@@ -0,0 +1,117 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.test import Client
+from django.test.utils import (
+    override_settings, setup_test_environment, teardown_test_environment
+)
+from django.urls import reverse
+
+from blog.comment_buffer import comment_buffer
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает запись комментариев без буфера и через буфер
+    (COMMENT_WRITE_BUFFER): несколько потоков одновременно отправляют
+    комментарии к одному посту через CommentCreateView, для каждого
+    режима выводятся сохранённые комментарии, ошибки ("database is
+    locked") и скорость в комментариях в секунду.
+    Созданные комментарии в конце удаляются.
+    """
+
+    help = 'Замер параллельной записи комментариев с буфером и без.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--per-thread', type=int, default=20,
+            help='Комментариев от каждого потока.'
+        )
+
+    def post_comments(self, post, count, marker):
+        client = Client()
+        url = reverse('blog:add_comment', args=[post.pk])
+        errors = []
+        try:
+            try:
+                # Вход тоже пишет в базу - сессию.
+                client.force_login(post.author)
+            except OperationalError as error:
+                return [str(error)] * count
+            for number in range(count):
+                try:
+                    response = client.post(
+                        url, {'text': f'{marker} {number}'}
+                    )
+                except OperationalError as error:
+                    errors.append(str(error))
+                    continue
+                if response.status_code != HTTPStatus.FOUND:
+                    errors.append(f'ответ {response.status_code}')
+        finally:
+            # У каждого потока своё соединение - закрываем его.
+            connection.close()
+        return errors
+
+    def run_mode(self, post, buffered, threads, per_thread):
+        marker = f'benchmark-comments-{uuid.uuid4().hex}'
+        started = time.perf_counter()
+        try:
+            with override_settings(COMMENT_WRITE_BUFFER=buffered):
+                with ThreadPoolExecutor(threads) as executor:
+                    errors = [
+                        error
+                        for chunk in executor.map(
+                            lambda _: self.post_comments(
+                                post, per_thread, marker
+                            ),
+                            range(threads),
+                        )
+                        for error in chunk
+                    ]
+            # Очередь дописывается до замера времени.
+            comment_buffer.drain()
+            elapsed = time.perf_counter() - started
+        finally:
+            created = Comment.objects.filter(text__startswith=marker)
+            saved = created.count()
+            created.delete()
+        return saved, errors, saved / elapsed
+
+    def handle(self, *args, **options):
+        post = Post.objects.select_related('author').first()
+        if post is None:
+            raise CommandError('В базе нет постов.')
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                mode = cursor.fetchone()[0]
+            self.stdout.write(f'SQLite, journal_mode={mode}')
+        threads, per_thread = options['threads'], options['per_thread']
+        self.stdout.write(
+            f'Потоков {threads}, комментариев от потока {per_thread}.'
+        )
+        self.stdout.write(
+            f'{"режим":<12} {"сохранено":>10} {"ошибок":>8} '
+            f'{"комм./с":>10}'
+        )
+        setup_test_environment()
+        try:
+            for buffered in (False, True):
+                saved, errors, rate = self.run_mode(
+                    post, buffered, threads, per_thread
+                )
+                name = 'буфер' if buffered else 'без буфера'
+                self.stdout.write(
+                    f'{name:<12} {saved:>10} {len(errors):>8} {rate:>10.0f}'
+                )
+                for error in sorted(set(errors)):
+                    self.stderr.write(f'  {error}')
+        finally:
+            teardown_test_environment()
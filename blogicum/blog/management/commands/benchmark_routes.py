@@ -0,0 +1,131 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+
+from blog.benchmark import measure, percentile, sample_urls
+
+
+class Command(BaseCommand):
+    """
+    Замеряет задержку и число SQL-запросов для каждого маршрута
+    из blog/urls.py - анонимно и от имени автора. Результат пишется
+    в JSON; при --baseline сравнивается с сохранённым прогоном, и
+    команда падает, если p95 вырос больше допуска или запросов стало
+    больше. Данные удобно готовить командой generate_data.
+    """
+
+    help = 'Нагрузочный замер маршрутов блога: p50/p95/p99 и запросы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать все кэши перед каждым запросом.'
+        )
+        parser.add_argument(
+            '--output', type=Path, default=None,
+            help='Куда сохранить результаты в JSON.'
+        )
+        parser.add_argument(
+            '--baseline', type=Path, default=None,
+            help='JSON предыдущего прогона для сравнения.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый относительный рост p95 (0.2 = 20%%).'
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=2.0,
+            help='Рост p95 меньше этого порога считается шумом.'
+        )
+
+    def clear_caches(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+    def run_route(self, client, url, options):
+        for _ in range(options['warmup']):
+            client.get(url)
+        timings, queries = [], []
+        for _ in range(options['iterations']):
+            if options['cold']:
+                self.clear_caches()
+            elapsed, count = measure(client, url)
+            timings.append(elapsed * 1000)
+            queries.append(count)
+        return {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'queries': max(queries),
+        }
+
+    def compare(self, results, baseline, tolerance, min_delta):
+        """Возвращает список регрессий относительно baseline."""
+        regressions = []
+        for key, current in results.items():
+            previous = baseline.get(key)
+            if previous is None:
+                continue
+            growth = current['p95_ms'] - previous['p95_ms']
+            if (
+                growth > min_delta
+                and growth > previous['p95_ms'] * tolerance
+            ):
+                regressions.append(
+                    f'{key}: p95 {previous["p95_ms"]} -> {current["p95_ms"]}'
+                )
+            if current['queries'] > previous['queries']:
+                regressions.append(
+                    f'{key}: запросов {previous["queries"]} '
+                    f'-> {current["queries"]}'
+                )
+        return regressions
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            author, urls = sample_urls()
+            if author is None:
+                raise CommandError('В базе нет опубликованных постов.')
+            clients = {'anonymous': Client(), 'author': Client()}
+            clients['author'].force_login(author)
+            results = {}
+            for name, url in urls.items():
+                for who, client in clients.items():
+                    key = f'{name} [{who}]'
+                    results[key] = self.run_route(client, url, options)
+                    self.stdout.write(
+                        '{:<36} p50 {p50_ms:>8.2f}  p95 {p95_ms:>8.2f}  '
+                        'p99 {p99_ms:>8.2f} мс  запросов {queries}'.format(
+                            key, **results[key]
+                        )
+                    )
+        finally:
+            teardown_test_environment()
+        if options['output']:
+            options['output'].write_text(
+                json.dumps(results, indent=2, ensure_ascii=False,
+                           sort_keys=True) + '\n'
+            )
+        if options['baseline']:
+            regressions = self.compare(
+                results,
+                json.loads(options['baseline'].read_text()),
+                options['tolerance'],
+                options['min_delta_ms'],
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии производительности:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
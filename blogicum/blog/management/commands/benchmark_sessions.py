@@ -0,0 +1,94 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment,
+    teardown_test_environment
+)
+
+from blog.benchmark import sample_urls
+
+ENGINES = ('db', 'cached_db', 'signed_cookies')
+READ_ROUTES = (
+    'blog:index', 'blog:post_detail', 'blog:category_posts', 'blog:profile'
+)
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+CACHED_BACKEND = 'blog.backends.CachedModelBackend'
+
+
+def is_auth_query(query) -> bool:
+    """Чтение сессии или пользователя сессии по id."""
+    return (
+        'django_session' in query['sql']
+        or 'FROM "auth_user" WHERE "auth_user"."id"' in query['sql']
+    )
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает режимы сессий (SESSION_MODE) с кэшем пользователя
+    (AUTH_USER_CACHE) и без него: сколько SQL-запросов и времени
+    уходит на страницу чтения залогиненного автора, и сколько
+    из этих запросов - к таблицам сессий и пользователей.
+    """
+
+    help = 'Замер сессий и аутентификации на страницах чтения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def run_mode(self, author, urls, iterations):
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        client = Client()
+        client.force_login(author)
+        for url in urls:
+            client.get(url)
+        total = auth = 0
+        started = time.perf_counter()
+        for _ in range(iterations):
+            for url in urls:
+                with CaptureQueriesContext(connection) as queries:
+                    client.get(url)
+                total += len(queries)
+                auth += sum(map(is_auth_query, queries))
+        pages = iterations * len(urls)
+        return (
+            total / pages, auth / pages,
+            (time.perf_counter() - started) * 1000 / pages
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            author, urls = sample_urls()
+            if author is None:
+                raise CommandError('В базе нет опубликованных постов.')
+            urls = [urls[name] for name in READ_ROUTES]
+            self.stdout.write(
+                f'{"режим":<34} {"SQL":>6} {"сессия+user":>12} {"мс":>8}'
+            )
+            for engine in ENGINES:
+                for user_cache in (False, True):
+                    backends = [MODEL_BACKEND]
+                    if user_cache:
+                        backends.insert(0, CACHED_BACKEND)
+                    with override_settings(
+                        SESSION_ENGINE=(
+                            f'django.contrib.sessions.backends.{engine}'
+                        ),
+                        AUTHENTICATION_BACKENDS=backends,
+                    ):
+                        queries, auth, elapsed = self.run_mode(
+                            author, urls, options['iterations']
+                        )
+                    name = engine + (' + кэш user' if user_cache else '')
+                    self.stdout.write(
+                        f'{name:<34} {queries:>6.2f} {auth:>12.2f} '
+                        f'{elapsed:>8.2f}'
+                    )
+        finally:
+            teardown_test_environment()
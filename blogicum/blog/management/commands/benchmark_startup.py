@@ -0,0 +1,93 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmark import sample_urls
+
+# Выполняется в отдельном процессе: поднимает WSGI-приложение так же,
+# как сервер, и по очереди запрашивает переданные URL. Печатает
+# моменты (time.time()) готовности приложения и каждого ответа.
+PROBE = '''
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+from blogicum.wsgi import application
+marks = [time.time()]
+for url in sys.argv[1:]:
+    path, _, query = url.partition('?')
+    environ = {'PATH_INFO': path, 'QUERY_STRING': query}
+    setup_testing_defaults(environ)
+    statuses = []
+    body = b''.join(application(
+        environ, lambda status, headers, exc_info=None: statuses.append(status)
+    ))
+    if not statuses[0].startswith('200'):
+        sys.exit(f'{url}: {statuses[0]}')
+    marks.append(time.time())
+print(json.dumps(marks))
+'''
+
+# Режимы шаблонов: (название, переменные окружения процесса).
+MODES = (
+    ('без кэша шаблонов', {'TEMPLATE_CACHE': '0', 'TEMPLATE_PRELOAD': '0'}),
+    ('кэш шаблонов', {'TEMPLATE_CACHE': '1', 'TEMPLATE_PRELOAD': '0'}),
+    ('кэш + предразбор', {'TEMPLATE_CACHE': '1', 'TEMPLATE_PRELOAD': '1'}),
+)
+
+
+class Command(BaseCommand):
+    """
+    Замеряет запуск воркера в каждом режиме шаблонов: время от
+    старта процесса до готового приложения, до первого ответа
+    и до ответа на следующие страницы. Каждый прогон - новый
+    процесс Python, результат - медиана по --runs прогонам.
+    """
+
+    help = 'Время от запуска процесса до первого ответа.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+
+    def probe(self, env, urls) -> list:
+        started = time.time()
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE, *urls],
+            cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip())
+        marks = json.loads(result.stdout.splitlines()[-1])
+        return [(mark - started) * 1000 for mark in marks]
+
+    def handle(self, *args, **options):
+        _, urls = sample_urls()
+        if not urls:
+            raise CommandError('В базе нет опубликованных постов.')
+        urls = [
+            urls['blog:index'], urls['blog:post_detail'],
+            urls['blog:profile'],
+        ]
+        self.stdout.write(
+            f'{"режим":<20} {"приложение":>11} {"1-й ответ":>10} '
+            f'{"все ответы":>11} мс'
+        )
+        for name, variables in MODES:
+            env = {
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+                **variables,
+            }
+            runs = [self.probe(env, urls) for _ in range(options['runs'])]
+            ready, first, last = (
+                statistics.median(run[index] for run in runs)
+                for index in (0, 1, -1)
+            )
+            self.stdout.write(
+                f'{name:<20} {ready:>11.1f} {first:>10.1f} {last:>11.1f}'
+            )
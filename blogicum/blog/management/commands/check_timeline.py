@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import timeline
+from blog.models import Post
+
+# Подписи расхождений из timeline.diff().
+PROBLEMS = {
+    'missing': 'нет в ленте',
+    'extra': 'лишние в ленте',
+    'wrong_date': 'другая дата публикации',
+}
+
+
+class Command(BaseCommand):
+    """
+    Сверяет таблицу общей ленты с живой выборкой
+    Post.objects.is_category_published(). При расхождениях
+    падает с ошибкой; --fix исправляет только разошедшиеся посты.
+    """
+
+    help = 'Проверяет, что общая лента совпадает с опубликованными постами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Исправить найденные расхождения.'
+        )
+        parser.add_argument(
+            '--show', type=int, default=10,
+            help='Сколько id постов выводить для каждого расхождения.'
+        )
+
+    def handle(self, *args, **options):
+        problems = timeline.diff()
+        drifted = sorted(set().union(*problems.values()))
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Лента совпадает.'))
+            return
+        for kind, ids in problems.items():
+            if ids:
+                self.stdout.write(
+                    f'{PROBLEMS[kind]}: {len(ids)} '
+                    f'{ids[:options["show"]]}'
+                )
+        if not options['fix']:
+            raise CommandError(
+                f'Лента разошлась для {len(drifted)} постов, '
+                'запустите с --fix или rebuild_timeline.'
+            )
+        timeline.sync(Post.objects.filter(pk__in=drifted))
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено постов: {len(drifted)}'
+        ))
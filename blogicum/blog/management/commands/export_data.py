@@ -0,0 +1,45 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from blog.bulk_data import dump_fixture, resolve_models
+
+
+class Command(BaseCommand):
+    """
+    Потоковая замена dumpdata: таблицы читаются итератором пачками
+    и пишутся в файл сразу, поэтому память не растёт с размером базы.
+    Результат загружается import_data или обычным loaddata.
+    """
+
+    help = 'Выгрузка моделей в JSON-фикстуру пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path)
+        parser.add_argument(
+            'labels', nargs='*',
+            help='app_label или app_label.Model; по умолчанию - все.'
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        try:
+            models = resolve_models(options['labels'])
+        except LookupError as error:
+            raise CommandError(error)
+        started = time.monotonic()
+        with options['path'].open('w', encoding='utf-8') as stream:
+            counts = dump_fixture(
+                models, stream, options['batch_size'], options['database']
+            )
+        for model, count in counts.items():
+            self.stdout.write(f'{model._meta.label}: {count}')
+        total = sum(counts.values())
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено {total} объектов за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} объектов/с)'
+        ))
@@ -0,0 +1,169 @@
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from blog import search, stats, timeline
+from blog.models import Category, Comment, Location, Post, User
+
+
+class Command(BaseCommand):
+    """
+    Создаёт синтетические данные продуктового объёма через bulk_create.
+    Распределения неравномерные (закон Ципфа): несколько авторов пишут
+    большую часть постов, несколько постов собирают большую часть
+    комментариев. Сигналы при этом не срабатывают, поэтому счётчики
+    комментариев и поисковый индекс заполняются отдельно.
+    """
+
+    help = 'Генерирует пользователей, категории, локации, посты и комментарии.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--locations', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель закона Ципфа для авторов и комментариев.'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365 * 3,
+            help='За сколько дней назад распределять даты публикаций.'
+        )
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--password', default='password',
+            help='Пароль всех сгенерированных пользователей.'
+        )
+        parser.add_argument(
+            '--skip-search-index', action='store_true',
+            help='Не перестраивать поисковый индекс.'
+        )
+
+    def zipf_weights(self, count, skew):
+        return list(
+            accumulate(1 / (rank + 1) ** skew for rank in range(count))
+        )
+
+    def report(self, label, count, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{label}: {count} за {elapsed:.1f} с '
+            f'({count / max(elapsed, 1e-9):.0f} в секунду)'
+        )
+
+    def create(self, model, objects, batch_size):
+        model.objects.bulk_create(objects, batch_size=batch_size)
+        # SQLite и PostgreSQL возвращают id из bulk_create не везде,
+        # поэтому перечитываем их по убыванию - новые строки последние.
+        return list(
+            model.objects.order_by('-pk').values_list('pk', flat=True)[
+                :len(objects)
+            ]
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        fake = Faker('ru_RU')
+        Faker.seed(options['seed'])
+        batch = options['batch_size']
+        now = timezone.now()
+        # Пул текстов: Faker слишком медленный, чтобы звать его на
+        # каждую из миллионов строк.
+        sentences = [fake.sentence(nb_words=10) for _ in range(2000)]
+        paragraphs = [fake.paragraph(nb_sentences=6) for _ in range(2000)]
+
+        started = time.monotonic()
+        password = make_password(options['password'])
+        prefix = f'user{int(time.time())}_'
+        users = self.create(User, [
+            User(username=f'{prefix}{number}', password=password,
+                 first_name=fake.first_name(), last_name=fake.last_name())
+            for number in range(options['users'])
+        ], batch)
+        self.report('Пользователи', len(users), started)
+
+        started = time.monotonic()
+        categories = self.create(Category, [
+            Category(title=fake.word().capitalize(),
+                     description=rng.choice(sentences),
+                     slug=f'{prefix}{number}'.replace('_', '-'))
+            for number in range(options['categories'])
+        ], batch)
+        locations = self.create(Location, [
+            Location(name=fake.city())
+            for _ in range(options['locations'])
+        ], batch)
+        self.report('Категории и локации',
+                    len(categories) + len(locations), started)
+
+        started = time.monotonic()
+        author_weights = self.zipf_weights(len(users), options['skew'])
+        posts = []
+        for _ in range(options['posts']):
+            pub_date = now - timedelta(
+                seconds=rng.randint(0, options['days'] * 24 * 3600)
+            )
+            posts.append(Post(
+                title=rng.choice(sentences)[:80],
+                text=rng.choice(paragraphs),
+                pub_date=pub_date,
+                author_id=rng.choices(users, cum_weights=author_weights)[0],
+                category_id=rng.choice(categories),
+                location_id=rng.choice(locations + [None]),
+                is_published=rng.random() > 0.02,
+            ))
+            if len(posts) >= batch:
+                Post.objects.bulk_create(posts)
+                posts = []
+        Post.objects.bulk_create(posts)
+        post_ids = list(
+            Post.objects.order_by('-pk').values_list('pk', flat=True)[
+                :options['posts']
+            ]
+        )
+        self.report('Посты', len(post_ids), started)
+
+        started = time.monotonic()
+        rng.shuffle(post_ids)
+        post_weights = self.zipf_weights(len(post_ids), options['skew'])
+        counts = Counter()
+        comments = []
+        for _ in range(options['comments'] if post_ids else 0):
+            post_id = rng.choices(post_ids, cum_weights=post_weights)[0]
+            counts[post_id] += 1
+            comments.append(Comment(
+                post_id=post_id,
+                author_id=rng.choice(users),
+                text=rng.choice(sentences),
+            ))
+            if len(comments) >= batch:
+                Comment.objects.bulk_create(comments)
+                comments = []
+        Comment.objects.bulk_create(comments)
+        Post.objects.bulk_update(
+            [Post(pk=pk, comment_count=count) for pk, count in counts.items()],
+            ['comment_count'], batch_size=batch
+        )
+        self.report('Комментарии', sum(counts.values()), started)
+
+        started = time.monotonic()
+        self.report('Статистика', stats.rebuild(), started)
+
+        started = time.monotonic()
+        self.report('Лента', timeline.rebuild(), started)
+
+        if not options['skip_search_index']:
+            started = time.monotonic()
+            self.report('Поисковый индекс', search.rebuild(batch), started)
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.core.management.base import BaseCommand
+
+from blog.constants import IMAGE_WORKERS
+from blog.images import build_variants_in_thread, needs_variants
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    """Готовит уменьшенные копии для уже загруженных изображений."""
+
+    help = 'Создаёт уменьшенные копии изображений постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=IMAGE_WORKERS,
+            help='Число параллельных потоков.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать копии, даже если они уже есть.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only('image', 'image_variants')
+        ids = [
+            post.pk for post in posts
+            if options['force'] or needs_variants(post)
+        ]
+        build = partial(build_variants_in_thread, force=options['force'])
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            built = sum(pool.map(build, ids))
+        # Посты с пропавшими или битыми файлами build_variants
+        # пропускает и пишет в лог blog.images.
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов: {built}, пропущено: {len(ids) - built}'
+        ))
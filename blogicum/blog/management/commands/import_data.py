@@ -0,0 +1,98 @@
+import time
+from pathlib import Path
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, IntegrityError
+from django.utils import timezone
+
+from blog.bulk_data import iter_fixture, load_fixture
+from blog.cache import (
+    FRAGMENT_CACHE_ALIAS, PAGE_CACHE_ALIAS, forget_next_publication
+)
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    """
+    Потоковая замена loaddata для больших JSON-фикстур (db.json,
+    выгрузки export_data). Файл разбирается по объектам, строки
+    вставляются через bulk_create пачками. Сигналы при этом не
+    срабатывают, поэтому после загрузки постов и комментариев
+    команда сама пересчитывает счётчики, отложенные публикации
+    и поисковый индекс и сбрасывает кэши страниц.
+    """
+
+    help = 'Быстрая загрузка JSON-фикстуры пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--skip-existing', action='store_true',
+            help='Пропускать строки, чьи ключи уже есть в базе.'
+        )
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не пересчитывать счётчики, индекс и кэши.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        loaded = batches = 0
+
+        def report(model, count):
+            nonlocal loaded, batches
+            loaded += count
+            batches += 1
+            if batches % 100 == 0:
+                self.stdout.write(self.rate(loaded, started))
+
+        try:
+            with options['path'].open(encoding='utf-8') as stream:
+                counts = load_fixture(
+                    iter_fixture(stream),
+                    options['batch_size'],
+                    options['database'],
+                    ignore_conflicts=options['skip_existing'],
+                    report=report,
+                )
+        except (ValueError, LookupError, IntegrityError) as error:
+            raise CommandError(f'Фикстура не загружена: {error}')
+        for model, count in counts.items():
+            self.stdout.write(f'{model._meta.label}: {count}')
+        self.stdout.write(self.style.SUCCESS(self.rate(loaded, started)))
+        if options['skip_derived'] or not (
+            Post in counts or Comment in counts
+        ):
+            return
+        if options['database'] != DEFAULT_DB_ALIAS:
+            self.stdout.write(
+                'Счётчики и индекс пересчитываются только для основной '
+                'базы - запустите reconcile_comment_counts и '
+                'rebuild_search_index на ней.'
+            )
+            return
+        self.rebuild_derived()
+
+    def rate(self, loaded, started) -> str:
+        elapsed = time.monotonic() - started
+        return (
+            f'Загружено {loaded} объектов за {elapsed:.1f} с '
+            f'({loaded / max(elapsed, 1e-9):.0f} объектов/с)'
+        )
+
+    def rebuild_derived(self):
+        """То, что при обычном сохранении делают сигналы."""
+        Post.objects.filter(
+            pub_date__gt=timezone.now(), is_scheduled=False
+        ).update(is_scheduled=True)
+        call_command('reconcile_comment_counts', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        call_command('rebuild_stats', stdout=self.stdout)
+        call_command('rebuild_timeline', stdout=self.stdout)
+        forget_next_publication()
+        caches[PAGE_CACHE_ALIAS].clear()
+        caches[FRAGMENT_CACHE_ALIAS].clear()
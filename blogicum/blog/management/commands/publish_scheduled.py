@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import Post
+from blog.scheduler import publish_due_posts
+
+
+class Command(BaseCommand):
+    """
+    Открывает отложенные публикации.
+    Без --loop выполняет один проход (удобно для cron), с --loop
+    работает как воркер и спит до ближайшей отложенной публикации.
+    """
+
+    help = 'Публикует отложенные посты, время которых наступило.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, а не выполнить один проход.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько постов открывать в одной транзакции.'
+        )
+        parser.add_argument(
+            '--max-sleep', type=float, default=60,
+            help='Максимальная пауза между проходами, секунд.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            published = publish_due_posts(options['batch_size'])
+            if published:
+                self.stdout.write(f'Опубликовано постов: {published}')
+            if not options['loop']:
+                return
+            time.sleep(self.get_sleep(options['max_sleep']))
+
+    def get_sleep(self, max_sleep: float) -> float:
+        upcoming = Post.objects.next_publication_date()
+        if upcoming is None:
+            return max_sleep
+        seconds = (upcoming - timezone.now()).total_seconds()
+        return min(max_sleep, max(seconds, 0))
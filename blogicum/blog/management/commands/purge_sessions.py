@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """
+    Удаляет просроченные сессии из таблицы пачками.
+    В отличие от clearsessions не держит одну длинную транзакцию
+    над всей таблицей: между пачками база свободна для записи
+    сессий входящих пользователей.
+    """
+
+    help = 'Удаляет просроченные сессии пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько сессий удалять за один запрос.'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между пачками, секунд.'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.SESSION_ENGINE.endswith(('.db', '.cached_db')):
+            self.stdout.write('Сессии хранятся не в базе, удалять нечего.')
+            return
+        started = time.monotonic()
+        now = timezone.now()
+        total = 0
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now).values_list(
+                    'session_key', flat=True
+                )[:options['batch_size']]
+            )
+            if not keys:
+                break
+            total += Session.objects.filter(session_key__in=keys).delete()[0]
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено сессий: {total} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
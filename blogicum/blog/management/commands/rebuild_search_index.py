@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import search
+
+
+class Command(BaseCommand):
+    """Заново заполняет полнотекстовый индекс постов и комментариев."""
+
+    help = 'Перестраивает поисковый индекс.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Сколько объектов индексировать за один проход.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = search.rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано объектов: {total} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
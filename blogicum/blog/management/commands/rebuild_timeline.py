@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import timeline
+
+
+class Command(BaseCommand):
+    """Заново заполняет таблицу общей ленты из опубликованных постов."""
+
+    help = 'Перестраивает общую ленту (TimelineEntry).'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = timeline.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей ленты: {total} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from blog import stats
+from blog.cache import invalidate_post_cards, purge_pages_on_commit
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    """Пересчитывает Post.comment_count там, где он разошёлся с таблицей."""
+
+    help = 'Сверяет денормализованный счётчик комментариев постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов обновлять за один запрос.'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = list(
+                Post.objects.annotate(
+                    actual=Count('comments')
+                ).exclude(
+                    comment_count=F('actual')
+                ).only('id', 'comment_count')
+            )
+            for post in drifted:
+                post.comment_count = post.actual
+            Post.objects.bulk_update(
+                drifted, ['comment_count'],
+                batch_size=options['batch_size']
+            )
+            self.refresh_derived(drifted, options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено постов: {len(drifted)}')
+        )
+
+    def refresh_derived(self, drifted, batch_size):
+        """
+        bulk_update не меняет updated_at и не отправляет сигналы:
+        карточки, страницы и сводки исправленных постов сбрасываем
+        сами, иначе старый счётчик виден до истечения кэша.
+        """
+        pairs = set()
+        for start in range(0, len(drifted), batch_size):
+            posts = Post.objects.filter(pk__in=[
+                post.pk for post in drifted[start:start + batch_size]
+            ])
+            transaction.on_commit(
+                lambda posts=posts: invalidate_post_cards(posts)
+            )
+            pairs.update(posts.values_list('category_id', 'author_id'))
+        purge_pages_on_commit(*(f'post:{post.pk}' for post in drifted))
+        stats.refresh_posts(pairs)
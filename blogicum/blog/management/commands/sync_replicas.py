@@ -0,0 +1,35 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    """
+    Копирует основную базу SQLite в файлы реплик из DB_REPLICAS -
+    замена настоящей репликации, чтобы проверить ReplicaRouter
+    локально на двух файлах SQLite. Для PostgreSQL реплики
+    настраиваются средствами самой базы.
+    """
+
+    help = 'Копирует основную базу SQLite в файлы реплик.'
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не заданы: укажите DB_REPLICAS.')
+        source = sqlite3.connect(settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                # Соединение Django с репликой держит файл - закрываем.
+                connections[alias].close()
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: скопировано.')
+        finally:
+            source.close()
@@ -0,0 +1,230 @@
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+
+from .constants import SLOW_REQUEST_MS, SLOW_REQUEST_TOP_QUERIES
+
+logger = logging.getLogger(__name__)
+
+# Счётчики текущего запроса. ContextVar, а не threading.local:
+# sync_to_async копирует контекст, и запросы async-представлений
+# из пула потоков попадают в счётчики своего запроса.
+current_stats: ContextVar = ContextVar('request_stats', default=None)
+
+# Имена счётчиков и их описание для /metrics/ в формате Prometheus.
+METRICS: dict = {
+    'requests': ('counter', 'Число запросов.'),
+    'seconds': ('counter', 'Суммарное время ответа, с.'),
+    'db_queries': ('counter', 'Число SQL-запросов.'),
+    'db_seconds': ('counter', 'Суммарное время SQL, с.'),
+    'template_seconds': ('counter', 'Суммарное время рендера шаблонов, с.'),
+    'cache_hits': ('counter', 'Попадания в кэш.'),
+    'cache_misses': ('counter', 'Промахи кэша.'),
+    'response_bytes': ('counter', 'Суммарный размер ответов, байт.'),
+    'slow_requests': ('counter', 'Запросы дольше порога SLOW_REQUEST_MS.'),
+}
+
+_MISSING = object()
+
+
+class RequestStats:
+    """Счётчики одного запроса, собираемые PerformanceMiddleware."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.template_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def db_seconds(self) -> float:
+        return sum(duration for _, duration in self.queries)
+
+    def top_queries(self, count: int) -> list:
+        """Самые долгие SQL-запросы: список (sql, секунды)."""
+        return sorted(
+            self.queries, key=lambda query: query[1], reverse=True
+        )[:count]
+
+
+class Registry:
+    """
+    Суммы счётчиков по именам представлений (blog:index и т.д.).
+    Живёт в памяти процесса: у каждого воркера сервера свои цифры.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view_name: str, values: dict) -> None:
+        with self._lock:
+            totals = self._views.setdefault(
+                view_name, dict.fromkeys(METRICS, 0)
+            )
+            for name, value in values.items():
+                totals[name] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                view_name: dict(totals)
+                for view_name, totals in self._views.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._views.clear()
+
+
+registry = Registry()
+
+
+def query_timer(execute, sql, params, many, context):
+    """
+    Обёртка выполнения SQL (connection.execute_wrapper):
+    засекает время запроса, если идёт учёт запроса.
+    """
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries.append((sql, time.perf_counter() - started))
+
+
+def instrument_connection(connection) -> None:
+    """Подключает query_timer к соединению с базой один раз."""
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+def instrument_cache(cache) -> None:
+    """
+    Оборачивает get/get_many экземпляра кэша, чтобы считать
+    попадания и промахи. Экземпляры кэшей у каждого потока свои,
+    поэтому обёртка ставится на экземпляр, а не на класс бэкенда.
+    """
+    if getattr(cache, '_instrumented', False):
+        return
+    get = cache.get
+
+    def counted_get(key, default=None, version=None):
+        value = get(key, _MISSING, version=version)
+        stats = current_stats.get()
+        if stats is not None:
+            if value is _MISSING:
+                stats.cache_misses += 1
+            else:
+                stats.cache_hits += 1
+        return default if value is _MISSING else value
+
+    cache.get = counted_get
+    # BaseCache.get_many сам вызывает get - второй раз не считаем.
+    if type(cache).get_many is not BaseCache.get_many:
+        get_many = cache.get_many
+
+        def counted_get_many(keys, version=None):
+            keys = list(keys)
+            found = get_many(keys, version=version)
+            stats = current_stats.get()
+            if stats is not None:
+                stats.cache_hits += len(found)
+                stats.cache_misses += len(keys) - len(found)
+            return found
+
+        cache.get_many = counted_get_many
+    cache._instrumented = True
+
+
+def instrument_caches() -> None:
+    """Подключает учёт ко всем кэшам текущего потока."""
+    for alias in settings.CACHES:
+        instrument_cache(caches[alias])
+
+
+def add_template_time(seconds: float) -> None:
+    stats = current_stats.get()
+    if stats is not None:
+        stats.template_seconds += seconds
+
+
+def finish(view_name: str, stats: RequestStats, response) -> dict:
+    """
+    Завершает учёт запроса: складывает счётчики в registry,
+    пишет в лог медленный запрос и возвращает значения запроса.
+    """
+    elapsed = time.perf_counter() - stats.started
+    values = {
+        'requests': 1,
+        'seconds': elapsed,
+        'db_queries': len(stats.queries),
+        'db_seconds': stats.db_seconds,
+        'template_seconds': stats.template_seconds,
+        'cache_hits': stats.cache_hits,
+        'cache_misses': stats.cache_misses,
+        'response_bytes': (
+            0 if response.streaming else len(response.content)
+        ),
+        'slow_requests': int(elapsed * 1000 > SLOW_REQUEST_MS),
+    }
+    registry.record(view_name, values)
+    if values['slow_requests']:
+        logger.warning(
+            'Медленный запрос %s: %.1f мс, SQL %d за %.1f мс. '
+            'Самые долгие запросы:\n%s',
+            view_name, elapsed * 1000, len(stats.queries),
+            stats.db_seconds * 1000,
+            '\n'.join(
+                f'{duration * 1000:.1f} мс: {sql}'
+                for sql, duration in stats.top_queries(
+                    SLOW_REQUEST_TOP_QUERIES
+                )
+            ),
+        )
+    return values
+
+
+def server_timing(values: dict) -> str:
+    """Значение заголовка Server-Timing для запроса."""
+    return ', '.join((
+        'db;dur={:.1f};desc="SQL x{}"'.format(
+            values['db_seconds'] * 1000, values['db_queries']
+        ),
+        'tpl;dur={:.1f}'.format(values['template_seconds'] * 1000),
+        'cache;desc="hit {} / miss {}"'.format(
+            values['cache_hits'], values['cache_misses']
+        ),
+        'total;dur={:.1f}'.format(values['seconds'] * 1000),
+    ))
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_prometheus(snapshot: dict) -> str:
+    """Счётчики в текстовом формате Prometheus."""
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        metric = f'blogicum_{name}_total'
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} {kind}')
+        for view_name, totals in sorted(snapshot.items()):
+            lines.append(
+                f'{metric}{{view="{_label(view_name)}"}} {totals[name]}'
+            )
+    return '\n'.join(lines) + '\n'
+
+
+def render_json(snapshot: dict) -> str:
+    return json.dumps(snapshot, ensure_ascii=False, sort_keys=True)
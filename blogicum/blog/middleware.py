@@ -0,0 +1,105 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import reverse
+
+from . import metrics, routers, staticfiles
+
+
+class StaticFilesMiddleware:
+    """
+    Отдаёт собранную collectstatic статику из STATIC_ROOT прямо
+    из процесса WSGI/ASGI-сервера: сжатую копию по Accept-Encoding,
+    с вечным кэшем для файлов с хешем в имени. Запрос к статике
+    не проходит остальные слои и не трогает базу. Список файлов
+    читается при запуске, после collectstatic сервер перезапускают.
+    Без собранной статики слой отключается.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.files = staticfiles.build_index(settings.STATIC_ROOT)
+        if not self.files:
+            raise MiddlewareNotUsed
+        self.prefix = settings.STATIC_URL
+
+    def __call__(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(self.prefix)
+        ):
+            static_file = self.files.get(
+                request.path_info[len(self.prefix):]
+            )
+            if static_file is not None:
+                return staticfiles.serve(request, static_file)
+        return self.get_response(request)
+
+
+class PerformanceMiddleware:
+    """
+    Учитывает для каждого запроса число и время SQL-запросов,
+    время рендера шаблона, попадания в кэш и размер ответа.
+    Итоги копятся по имени представления (blog:index и т.д.)
+    и отдаются на /metrics/, значения запроса - в заголовке
+    Server-Timing. Медленные запросы пишутся в лог blog.metrics
+    вместе с самыми долгими SQL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics.instrument_caches()
+        stats = metrics.RequestStats()
+        token = metrics.current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_stats.reset(token)
+        match = request.resolver_match
+        values = metrics.finish(
+            match.view_name if match else 'unresolved', stats, response
+        )
+        response['Server-Timing'] = metrics.server_timing(values)
+        return response
+
+    def process_template_response(self, request, response):
+        # Вызывается прямо перед рендером TemplateResponse.
+        started = time.perf_counter()
+        response.add_post_render_callback(
+            lambda rendered: metrics.add_template_time(
+                time.perf_counter() - started
+            )
+        )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает ReplicaRouter читать из реплик в читающих запросах.
+    Пишущие запросы и админка читают из основной базы; после записи
+    пользователь получает cookie, и его чтения какое-то время тоже
+    идут в основную базу - он сразу видит свой пост или комментарий.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        writes = request.method not in routers.SAFE_METHODS
+        token = routers.use_replica.set(
+            not writes
+            and not routers.is_sticky(request)
+            and not request.path.startswith(reverse('admin:index'))
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.use_replica.reset(token)
+        if writes:
+            routers.mark_sticky(response)
+        return response
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.16 on 2026-10-18 00:52
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_scheduled_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(pub_date__gt=timezone.now()).update(is_scheduled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_published_feed_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_category_feed_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_scheduled',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Отложенная публикация'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_scheduled', False)), fields=['-pub_date', '-id'], name='post_published_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_scheduled', False)), fields=['category', '-pub_date', '-id'], name='post_category_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_scheduled', True)), fields=['pub_date'], name='post_scheduled_idx'),
+        ),
+        migrations.RunPython(mark_scheduled_posts, migrations.RunPython.noop),
+    ]
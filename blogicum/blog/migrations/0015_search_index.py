@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE blog_search USING fts5('
+        'post_id UNINDEXED, title, body, '
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    # Совпадение в заголовке весит в 10 раз больше, чем в тексте.
+    schema_editor.execute(
+        "INSERT INTO blog_search (blog_search, rank) "
+        "VALUES ('rank', 'bm25(0.0, 10.0, 1.0)')"
+    )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS blog_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
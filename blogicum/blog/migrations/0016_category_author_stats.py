@@ -0,0 +1,68 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:41
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_stats(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    published = Post.objects.filter(
+        is_published=True, is_scheduled=False
+    ).order_by()
+    for model_name, key in (
+        ('CategoryStats', 'category_id'), ('AuthorStats', 'author_id')
+    ):
+        model = apps.get_model('blog', model_name)
+        model.objects.bulk_create([
+            model(
+                pk=row[key],
+                post_count=row['posts'],
+                comment_count=row['comments'],
+                last_published_at=row['last'],
+            )
+            for row in published.exclude(**{key: None}).values(key).annotate(
+                posts=Count('pk'),
+                comments=Coalesce(Sum('comment_count'), 0),
+                last=Max('pub_date'),
+            )
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('blog', '0015_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Опубликовано постов')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев к опубликованным постам')),
+                ('last_published_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя публикация')),
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='auth.user', verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Опубликовано постов')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев к опубликованным постам')),
+                ('last_published_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя публикация')),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='blog.category', verbose_name='Категория')),
+            ],
+            options={
+                'verbose_name': 'статистика категории',
+                'verbose_name_plural': 'Статистика категорий',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_timeline(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    TimelineEntry = apps.get_model('blog', 'TimelineEntry')
+    TimelineEntry.objects.bulk_create([
+        TimelineEntry(post_id=pk, pub_date=pub_date)
+        for pk, pub_date in Post.objects.filter(
+            is_published=True,
+            is_scheduled=False,
+            category__is_published=True,
+        ).values_list('pk', 'pub_date').iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_category_author_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='timeline_entry', serialize=False, to='blog.post', verbose_name='Публикация')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата и время публикации')),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Лента',
+                'ordering': ('-pub_date', '-post'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['-pub_date', '-post'], name='timeline_feed_idx'),
+        ),
+        migrations.RunPython(fill_timeline, migrations.RunPython.noop),
+    ]
@@ -13,12 +13,29 @@ User = get_user_model()
 
 class PostManager(models.Manager):
     def published(self):
-        """Возвращает опубликованные посты."""
+        """
+        Возвращает опубликованные посты.
+        Отложенные посты открывает команда publish_scheduled,
+        поэтому результат не зависит от текущего времени.
+        """
         return self.filter(
             is_published=True,
+            is_scheduled=False
+        )
+
+    def due_for_publication(self):
+        """Отложенные посты, время публикации которых уже наступило."""
+        return self.filter(
+            is_scheduled=True,
             pub_date__lte=timezone.now()
         )
 
+    def next_publication_date(self):
+        """Время ближайшей отложенной публикации или None."""
+        return self.filter(
+            is_scheduled=True
+        ).aggregate(next=models.Min('pub_date'))['next']
+
     def is_category_published(self):
         """
         Возвращает опубликованные посты
@@ -110,6 +127,30 @@ class Post(BaseModel):
         blank=True,
         upload_to='posts_images'
     )
+    # Уменьшенные копии image, заполняет images.py:
+    # {'source': имя оригинала, 'variants': [[ширина, имя файла], ...]}.
+    image_variants = models.JSONField(
+        'Копии изображения',
+        default=dict,
+        blank=True,
+        editable=False
+    )
+    # Выставляется автоматически, если pub_date в будущем (signals.py).
+    is_scheduled = models.BooleanField(
+        'Отложенная публикация',
+        default=False,
+        editable=False
+    )
+    updated_at = models.DateTimeField(
+        'Изменено',
+        auto_now=True
+    )
+    # Денормализованный счётчик, поддерживается сигналами из signals.py.
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
     objects = PostManager()
 
     class Meta:
@@ -117,6 +158,31 @@ class Post(BaseModel):
         verbose_name_plural = 'Публикации'
         default_related_name = 'post'
         ordering = ('-pub_date',)
+        # Индексы под выборки PostManager: общая лента,
+        # лента категории и лента автора. Частичные индексы
+        # содержат только опубликованные посты.
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_published=True, is_scheduled=False),
+                name='post_published_feed_idx'
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                condition=models.Q(is_published=True, is_scheduled=False),
+                name='post_category_feed_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx'
+            ),
+            # Очередь отложенных публикаций.
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_scheduled=True),
+                name='post_scheduled_idx'
+            ),
+        )
 
     def __str__(self) -> str:
         return self.title
@@ -146,6 +212,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx'
+            ),
+        )
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -154,3 +226,98 @@ class Comment(models.Model):
 
     def get_absolute_url(self):
         return reverse("model_detail", kwargs={"pk": self.pk})
+
+
+class StatsBase(models.Model):
+    """
+    Абстрактная модель сводки по опубликованным постам.
+    Строки поддерживаются сигналами из signals.py и пересчитываются
+    командой rebuild_stats, на страницах читаются готовыми.
+    """
+
+    post_count = models.PositiveIntegerField(
+        'Опубликовано постов',
+        default=0
+    )
+    comment_count = models.PositiveIntegerField(
+        'Комментариев к опубликованным постам',
+        default=0
+    )
+    last_published_at = models.DateTimeField(
+        'Последняя публикация',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        abstract = True
+
+
+class CategoryStats(StatsBase):
+    """Сводка по опубликованным постам категории."""
+
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Категория'
+    )
+
+    class Meta:
+        verbose_name = 'статистика категории'
+        verbose_name_plural = 'Статистика категорий'
+
+    def __str__(self) -> str:
+        return f'Статистика категории {self.category_id}'
+
+
+class AuthorStats(StatsBase):
+    """Сводка по опубликованным постам автора."""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        verbose_name = 'статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self) -> str:
+        return f'Статистика автора {self.author_id}'
+
+
+class TimelineEntry(models.Model):
+    """
+    Пост общей ленты. Таблица повторяет выборку
+    PostManager.is_category_published(): строка появляется, когда пост
+    становится виден, и удаляется, когда пост скрыт, удалён или скрыта
+    его категория. Поддерживается сигналами из signals.py.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='timeline_entry',
+        verbose_name='Публикация'
+    )
+    pub_date = models.DateTimeField('Дата и время публикации')
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        ordering = ('-pub_date', '-post')
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-post'),
+                name='timeline_feed_idx'
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'Запись ленты {self.post_id}'
@@ -0,0 +1,264 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Max, Q, QuerySet
+from django.utils.functional import cached_property
+
+from .cache import cached_count
+from .constants import ADMIN_EXACT_COUNT_LIMIT, MAX_DB_INTEGER
+
+
+class KeysetPage:
+    """
+    Страница курсорной пагинации.
+    В отличие от django.core.paginator.Page не знает общего числа
+    страниц - только есть ли соседние и курсоры для перехода к ним.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, has_next, has_previous,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    """
+    Курсорная (seek) пагинация по паре полей (дата, id).
+    Вместо OFFSET и COUNT(*) запрашивает per_page + 1 строк после
+    ключа последнего объекта, поэтому глубокие страницы стоят
+    столько же, сколько первая.
+    """
+
+    NEXT = 'n'
+    PREVIOUS = 'p'
+
+    def __init__(self, queryset: QuerySet, per_page: int,
+                 date_field: str = 'pub_date', descending: bool = True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.date_field = date_field
+        # Лента постов идёт от новых к старым, комментарии - наоборот.
+        self.descending = descending
+
+    def get_key(self, obj) -> tuple:
+        """Ключ (дата, id) модели или словаря из QuerySet.values()."""
+        if isinstance(obj, dict):
+            return obj[self.date_field], obj['id']
+        return getattr(obj, self.date_field), obj.pk
+
+    def encode_cursor(self, direction: str, obj) -> str:
+        """Упаковывает ключ объекта в непрозрачный токен для URL."""
+        date, pk = self.get_key(obj)
+        payload = json.dumps([direction, date.isoformat(), pk])
+        return base64.urlsafe_b64encode(
+            payload.encode()
+        ).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Распаковывает токен; при любой ошибке возвращает None."""
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, date, pk = json.loads(
+                base64.urlsafe_b64decode(padded.encode())
+            )
+            pk = int(pk)
+            # Больший id SQLite не переведёт в INTEGER (OverflowError).
+            if direction not in (self.NEXT, self.PREVIOUS) or not (
+                -MAX_DB_INTEGER <= pk <= MAX_DB_INTEGER
+            ):
+                return None
+            return direction, datetime.fromisoformat(date), pk
+        except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+            return None
+
+    def _ordering(self, reverse: bool = False) -> tuple:
+        sign = '-' if self.descending != reverse else ''
+        return f'{sign}{self.date_field}', f'{sign}pk'
+
+    def _seek(self, date, pk, reverse: bool = False) -> QuerySet:
+        """
+        Объекты после ключа в порядке ленты
+        (reverse=True - объекты до ключа, в обратном порядке).
+        """
+        op = 'lt' if self.descending != reverse else 'gt'
+        lookup = Q(**{f'{self.date_field}__{op}': date}) | Q(
+            **{self.date_field: date, f'pk__{op}': pk}
+        )
+        return self.queryset.filter(lookup).order_by(
+            *self._ordering(reverse)
+        )
+
+    def _build_page(self, objects, has_next, has_previous) -> KeysetPage:
+        return KeysetPage(
+            objects,
+            has_next=has_next,
+            has_previous=has_previous,
+            next_cursor=(
+                self.encode_cursor(self.NEXT, objects[-1])
+                if has_next and objects else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(self.PREVIOUS, objects[0])
+                if has_previous and objects else None
+            ),
+        )
+
+    def cursor_ending_with(self, obj):
+        """
+        Курсор страницы, последний объект которой - obj: перед ним
+        per_page - 1 предыдущих. None - obj попадает на первую страницу.
+        """
+        date, pk = self.get_key(obj)
+        anchor = list(
+            self._seek(date, pk, reverse=True)[
+                self.per_page - 1:self.per_page
+            ]
+        )
+        return self.encode_cursor(self.NEXT, anchor[0]) if anchor else None
+
+    def first_page(self) -> KeysetPage:
+        objects = list(
+            self.queryset.order_by(*self._ordering())[:self.per_page + 1]
+        )
+        has_next = len(objects) > self.per_page
+        return self._build_page(objects[:self.per_page], has_next, False)
+
+    def get_page(self, cursor) -> KeysetPage:
+        """
+        Возвращает страницу по токену курсора.
+        Пустой или испорченный токен - первая страница.
+        """
+        key = self.decode_cursor(cursor)
+        if key is None:
+            return self.first_page()
+        direction, date, pk = key
+        if direction == self.NEXT:
+            objects = list(self._seek(date, pk)[:self.per_page + 1])
+            has_next = len(objects) > self.per_page
+            return self._build_page(objects[:self.per_page], has_next, True)
+        objects = list(
+            self._seek(date, pk, reverse=True)[:self.per_page + 1]
+        )
+        if len(objects) <= self.per_page:
+            # Дошли до начала ленты - показываем обычную первую страницу.
+            return self.first_page()
+        objects = objects[:self.per_page][::-1]
+        return self._build_page(objects, True, True)
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator номерных страниц ленты: число постов считается
+    один раз и хранится в кэше, пока не сброшен ни один из тегов
+    tags. Листание ?page=N не выполняет COUNT(*) на каждый запрос.
+    """
+
+    def __init__(self, object_list, per_page, tags=(), **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.tags = tags
+
+    @cached_property
+    def count(self) -> int:
+        if not self.tags:
+            return super().count
+        return cached_count(self.object_list, self.tags)
+
+
+def estimate_count(queryset: QuerySet):
+    """
+    Приблизительное число строк таблицы без COUNT(*):
+    статистика планировщика в PostgreSQL, максимальный id в SQLite
+    (больше настоящего числа, если строки удалялись).
+    None - оценить нельзя.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row and row[0] >= 0 else None
+    if connection.vendor == 'sqlite':
+        return queryset.model._default_manager.using(
+            queryset.db
+        ).aggregate(count=Max('pk'))['count'] or 0
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator для больших таблиц в админке: без фильтров число строк
+    оценивается по estimate_count, точный COUNT(*) выполняется только
+    для отфильтрованных выборок и маленьких таблиц.
+    Оценка может быть больше настоящего числа строк: номер страницы
+    за концом данных даёт пустую страницу, а не EmptyPage, и первая
+    неполная страница исправляет число строк - дальше неё ссылок нет.
+    """
+
+    estimated = False
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate > ADMIN_EXACT_COUNT_LIMIT:
+                self.estimated = True
+                return estimate
+        return super().count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.estimated and int(number) > 1:
+                return int(number)
+            raise
+
+    def page(self, number):
+        page = super().page(number)
+        if self.estimated:
+            # len() выполняет запрос и оставляет строки в кэше QuerySet:
+            # админке страница нужна именно QuerySet для list_editable.
+            rows = len(page.object_list)
+            if rows < self.per_page:
+                # Строки кончились раньше оценки: неполная страница -
+                # последняя, по пустой конец данных не виден, и число
+                # строк один раз считается точно.
+                self.count = (
+                    (page.number - 1) * self.per_page + rows if rows
+                    else super().count
+                )
+                self.__dict__.pop('num_pages', None)
+        return page
@@ -0,0 +1,72 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .constants import REPLICA_STICKY_COOKIE, REPLICA_STICKY_SECONDS
+
+# Можно ли в текущем запросе читать из реплики. Включает только
+# ReplicaRoutingMiddleware: команды, фоновые потоки и всё, что
+# идёт вне запроса, читают основную базу. ContextVar - чтобы
+# значение доходило до async-представлений в пуле потоков.
+use_replica: ContextVar = ContextVar('use_replica', default=False)
+
+# Методы, которые не пишут в базу.
+SAFE_METHODS: tuple = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRouter:
+    """
+    Запись всегда идёт в основную базу. Чтение в запросах, которым
+    ReplicaRoutingMiddleware разрешила реплику, идёт в случайную
+    реплику из DATABASE_REPLICAS, кроме чтения внутри транзакции
+    основной базы. Без реплик роутер ничего не меняет.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or not use_replica.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты читаем оттуда же, откуда сам объект.
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему реплик переносит репликация, а не migrate.
+        return db not in settings.DATABASE_REPLICAS
+
+
+def is_sticky(request) -> bool:
+    """Записывал ли пользователь недавно - по cookie из mark_sticky."""
+    try:
+        return float(request.COOKIES[REPLICA_STICKY_COOKIE]) > time.time()
+    except (KeyError, ValueError):
+        return False
+
+
+def mark_sticky(response) -> None:
+    """Следующие REPLICA_STICKY_SECONDS читать из основной базы."""
+    response.set_cookie(
+        REPLICA_STICKY_COOKIE,
+        str(time.time() + REPLICA_STICKY_SECONDS),
+        max_age=REPLICA_STICKY_SECONDS,
+        httponly=True,
+        samesite='Lax',
+    )
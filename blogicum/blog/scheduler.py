@@ -0,0 +1,27 @@
+from django.db import transaction
+
+from .models import Post
+from .signals import posts_published
+
+
+def publish_due_posts(batch_size: int) -> int:
+    """
+    Открывает отложенные посты, время которых наступило,
+    пачками по batch_size. Возвращает число открытых постов.
+    """
+    published = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                Post.objects.due_for_publication()
+                .select_for_update()
+                .order_by('pub_date')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return published
+            Post.objects.filter(pk__in=ids).update(is_scheduled=False)
+        posts_published.send(
+            sender=Post, posts=Post.objects.filter(pk__in=ids)
+        )
+        published += len(ids)
@@ -0,0 +1,178 @@
+import re
+from functools import lru_cache
+
+import snowballstemmer
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Comment, Post
+
+# Полнотекстовый индекс - виртуальная таблица FTS5 (миграция 0015).
+# В ней хранятся основы слов, поэтому поиск находит все словоформы.
+SEARCH_TABLE = 'blog_search'
+SNIPPET_WORDS = 30
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+_stemmer = snowballstemmer.stemmer('russian')
+
+
+def is_supported() -> bool:
+    """FTS5 есть только у SQLite, на других БД поиск идёт через LIKE."""
+    return connection.vendor == 'sqlite'
+
+
+@lru_cache(maxsize=100_000)
+def stem(word: str) -> str:
+    return _stemmer.stemWord(word.lower().replace('ё', 'е'))
+
+
+def stem_text(text: str) -> str:
+    """Приводит текст к строке основ слов для индекса."""
+    return ' '.join(stem(word) for word in WORD_RE.findall(text))
+
+
+def _rowid(kind: str, object_id: int) -> int:
+    """
+    rowid строки индекса: чётные - посты, нечётные - комментарии.
+    Удаление и замена по rowid не требуют прохода по таблице.
+    """
+    return object_id * 2 + (kind == 'comment')
+
+
+def _replace_rows(kind: str, rows, replace: bool = True) -> None:
+    """rows - кортежи (object_id, post_id, title, body)."""
+    if not is_supported() or not rows:
+        return
+    with connection.cursor() as cursor:
+        if replace:
+            cursor.executemany(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+                [(_rowid(kind, row[0]),) for row in rows]
+            )
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, post_id, title, body) '
+            'VALUES (%s, %s, %s, %s)',
+            [
+                (_rowid(kind, object_id), post_id,
+                 stem_text(title), stem_text(body))
+                for object_id, post_id, title, body in rows
+            ]
+        )
+
+
+def index_posts(posts, replace: bool = True) -> None:
+    _replace_rows(
+        'post', [(post.pk, post.pk, post.title, post.text) for post in posts],
+        replace
+    )
+
+
+def index_comments(comments, replace: bool = True) -> None:
+    _replace_rows(
+        'comment', [(comment.pk, comment.post_id, '', comment.text)
+                    for comment in comments],
+        replace
+    )
+
+
+def remove(kind: str, *object_ids: int) -> None:
+    if is_supported() and object_ids:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+                [(_rowid(kind, object_id),) for object_id in object_ids]
+            )
+
+
+def build_match(query: str) -> str:
+    """
+    Строит выражение MATCH: все основы слов запроса должны
+    встретиться. Кавычки исключают синтаксис FTS5
+    из пользовательского ввода.
+    """
+    stems = [stem(word) for word in WORD_RE.findall(query)]
+    return ' '.join('"%s"' % s.replace('"', '""') for s in stems if s)
+
+
+def search_post_ids(query: str, limit: int, offset: int = 0) -> list:
+    """
+    Возвращает id видимых постов, подходящих под запрос, по убыванию
+    релевантности. Совпадения в комментариях поднимают их пост.
+    """
+    visible = Post.objects.is_category_published()
+    if not is_supported():
+        return list(
+            visible.filter(
+                Q(title__icontains=query) | Q(text__icontains=query)
+            ).order_by('-pub_date').values_list(
+                'pk', flat=True
+            )[offset:offset + limit]
+        )
+    match = build_match(query)
+    if not match:
+        return []
+    # Сначала совпадения из индекса, затем видимость только для них:
+    # коррелированный EXISTS ищет пост по первичному ключу. Условие
+    # post_id IN (видимые посты) проходило бы по всем опубликованным
+    # постам на каждый запрос, даже для слова с одним совпадением.
+    visible_sql, visible_params = visible.filter(
+        pk=RawSQL('hits.post_id', ())
+    ).order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'WITH hits AS ('
+            f'SELECT post_id, MIN(rank) AS score FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s GROUP BY post_id) '
+            f'SELECT post_id FROM hits WHERE EXISTS ({visible_sql}) '
+            'ORDER BY score LIMIT %s OFFSET %s',
+            [match, *visible_params, limit, offset]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def snippet(text: str, query: str) -> str:
+    """
+    Фрагмент текста вокруг первого совпадения,
+    найденные словоформы выделены тегом <mark>.
+    """
+    stems = {stem(word) for word in WORD_RE.findall(query)}
+    words = text.split()
+    hits = [
+        index for index, word in enumerate(words)
+        if any(stem(part) in stems for part in WORD_RE.findall(word))
+    ]
+    start = max(0, hits[0] - SNIPPET_WORDS // 3) if hits else 0
+    window = range(start, min(len(words), start + SNIPPET_WORDS))
+    hit_set = set(hits)
+    parts = [
+        f'<mark>{escape(words[i])}</mark>' if i in hit_set
+        else escape(words[i])
+        for i in window
+    ]
+    prefix = '… ' if start else ''
+    suffix = ' …' if window.stop < len(words) else ''
+    return mark_safe(prefix + ' '.join(parts) + suffix)
+
+
+@transaction.atomic
+def rebuild(batch_size: int) -> int:
+    """Переиндексирует все посты и комментарии. Возвращает число строк."""
+    if not is_supported():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    total = 0
+    for model, index in ((Post, index_posts), (Comment, index_comments)):
+        batch = []
+        for obj in model.objects.order_by().iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                index(batch, replace=False)
+                total += len(batch)
+                batch = []
+        index(batch, replace=False)
+        total += len(batch)
+    return total
@@ -0,0 +1,437 @@
+from collections import Counter
+from contextvars import ContextVar
+
+from django.core.cache import caches
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .cache import (
+    FRAGMENT_CACHE_ALIAS, forget_next_publication, invalidate_post_card,
+    invalidate_post_cards, post_card_key, purge_pages_on_commit
+)
+from . import database, metrics, search, stats, timeline
+from .backends import forget_user
+from .images import needs_variants, remove_variants, schedule_variants
+from .models import Category, Comment, Location, Post, TimelineEntry, User
+
+# Отправляется командой publish_scheduled после открытия пачки
+# отложенных постов, аргумент posts - QuerySet открытых постов.
+posts_published = Signal()
+# Отправляется comment_buffer.py после вставки пачки комментариев
+# через bulk_create (post_save при этом не отправляется), аргумент
+# comments - список сохранённых комментариев.
+comments_created = Signal()
+
+# id постов, которые удаляются сейчас вместе с комментариями.
+# Комментарии каскада не пересчитывают счётчик, сводки и индекс
+# по одному - это делают сигналы самого поста.
+deleting_posts: ContextVar = ContextVar('deleting_posts', default=frozenset())
+
+
+@receiver(pre_delete, sender=Post)
+def start_post_delete(sender, instance, **kwargs):
+    """Помечает пост и убирает из индекса его комментарии одним запросом."""
+    deleting_posts.set(deleting_posts.get() | {instance.pk})
+    search.remove(
+        'comment', *instance.comments.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Post)
+def finish_post_delete(sender, instance, **kwargs):
+    deleting_posts.set(deleting_posts.get() - {instance.pk})
+
+
+def deleted_with_post(comment) -> bool:
+    """Комментарий удаляется каскадом вместе со своим постом."""
+    return comment.post_id in deleting_posts.get()
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """Увеличивает счётчик комментариев поста при создании комментария."""
+    if kwargs.get('raw'):
+        return
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """
+    Уменьшает счётчик при удалении комментария.
+    Срабатывает и для удалений из админки, и для QuerySet.delete().
+    """
+    if deleted_with_post(instance):
+        return
+    Post.objects.filter(
+        pk=instance.post_id, comment_count__gt=0
+    ).update(
+        comment_count=F('comment_count') - 1
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def update_comment_stats(sender, instance, created=False, **kwargs):
+    """Комментарий к опубликованному посту меняет сводки."""
+    if kwargs.get('raw') or deleted_with_post(instance):
+        return
+    if kwargs.get('signal') is post_delete:
+        stats.add_comments(instance.post_id, -1)
+    elif created:
+        stats.add_comments(instance.post_id, 1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_post_card(sender, instance, **kwargs):
+    """
+    Счётчик комментариев выводится в карточке - сбрасываем её.
+    Комментарий не меняет updated_at поста, ключ карточки прежний:
+    сброс до COMMIT дал бы сохранить старый счётчик без срока.
+    """
+    if kwargs.get('raw') or deleted_with_post(instance):
+        return
+    posts = Post.objects.filter(pk=instance.post_id)
+    transaction.on_commit(lambda: invalidate_post_cards(posts))
+
+
+@receiver(comments_created)
+def count_created_comments(sender, comments, **kwargs):
+    """Счётчики пачки - одним UPDATE на пост, а не на комментарий."""
+    for post_id, count in Counter(
+        comment.post_id for comment in comments
+    ).items():
+        Post.objects.filter(pk=post_id).update(
+            comment_count=F('comment_count') + count
+        )
+        stats.add_comments(post_id, count)
+
+
+@receiver(comments_created)
+def refresh_commented_posts(sender, comments, **kwargs):
+    """
+    Карточки, страницы постов и поиск - как для одного комментария.
+    Пачка отправляется внутри транзакции записи, поэтому всё это -
+    после COMMIT: иначе соседний запрос закэширует страницу без пачки,
+    а откат оставит в индексе несуществующие комментарии.
+    """
+    post_ids = {comment.post_id for comment in comments}
+    posts = Post.objects.filter(pk__in=post_ids)
+    transaction.on_commit(lambda: invalidate_post_cards(posts))
+    purge_pages_on_commit(*(f'post:{post_id}' for post_id in post_ids))
+    transaction.on_commit(lambda: search.index_comments(comments))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_saved_post_card(sender, instance, **kwargs):
+    """
+    Новый updated_at сам по себе даёт новый ключ карточки,
+    но save(update_fields=...) может его не записать - тогда
+    в кэше карточка лежит под прежним updated_at из базы.
+    """
+    if kwargs.get('raw'):
+        return
+    invalidate_post_card(instance)
+    before = getattr(instance, '_feed_fields_before', None)
+    if before is not None and before['updated_at'] != instance.updated_at:
+        caches[FRAGMENT_CACHE_ALIAS].delete(
+            post_card_key(instance.pk, before['updated_at'])
+        )
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def invalidate_related_post_cards(sender, instance, **kwargs):
+    """
+    Сбрасывает карточки постов категории или локации.
+    При удалении используем pre_delete: после него у постов
+    уже обнулён внешний ключ и найти их будет нельзя.
+    """
+    if kwargs.get('raw'):
+        return
+    field = 'category' if sender is Category else 'location'
+    invalidate_post_cards(Post.objects.filter(**{field: instance}))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_post_cards(sender, instance, created,
+                                 update_fields=None, **kwargs):
+    """
+    Имя автора выводится в карточке поста.
+    Обновление last_login при входе карточки не затрагивает.
+    """
+    if kwargs.get('raw'):
+        return
+    if created or (update_fields and 'username' not in update_fields):
+        return
+    invalidate_post_cards(Post.objects.filter(author=instance))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    """Пароль, is_active и имя в кэше должны быть свежими."""
+    forget_user(instance.pk)
+
+
+# Поля, от которых зависит, на каких страницах лент выводится объект.
+FEED_FIELDS = {
+    Post: (
+        'is_published', 'is_scheduled', 'pub_date', 'category_id',
+        'author_id',
+    ),
+    Category: ('is_published',),
+}
+# Поля, прежние значения которых нужны сигналам, но не меняют
+# состав лент: по updated_at из базы построен ключ карточки в кэше,
+# comment_count вычитается из сводок при переносе поста.
+BEFORE_FIELDS = {
+    Post: ('updated_at', 'comment_count'),
+}
+
+
+@receiver(pre_save, sender=Post)
+def mark_scheduled(sender, instance, **kwargs):
+    """Пост с датой в будущем ждёт команды publish_scheduled."""
+    if kwargs.get('raw'):
+        return
+    instance.is_scheduled = instance.pub_date > timezone.now()
+
+
+@receiver(post_save, sender=Post)
+def reschedule(sender, instance, **kwargs):
+    if instance.is_scheduled:
+        forget_next_publication()
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Category)
+def remember_feed_fields(sender, instance, **kwargs):
+    """Запоминает прежние значения полей, влияющих на состав лент."""
+    if kwargs.get('raw'):
+        return
+    fields = FEED_FIELDS[sender] + BEFORE_FIELDS.get(sender, ())
+    instance._feed_fields_before = (
+        sender.objects.filter(pk=instance.pk).values(*fields).first()
+        if instance.pk else None
+    )
+
+
+def feed_fields_changed(sender, instance) -> bool:
+    before = getattr(instance, '_feed_fields_before', None)
+    return before is None or any(
+        before[field] != getattr(instance, field)
+        for field in FEED_FIELDS[sender]
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_pages(sender, instance, **kwargs):
+    """
+    Правка поста сбрасывает страницы, где он выведен.
+    Если пост появился, исчез, сменил категорию или автора -
+    сбрасываем ещё и ленты, куда он попадает или откуда уходит.
+    """
+    if kwargs.get('raw'):
+        return
+    tags = {f'post:{instance.pk}'}
+    if kwargs.get('signal') is post_delete or feed_fields_changed(
+        sender, instance
+    ):
+        tags.add('feed:index')
+        tags.add(f'feed:category:{instance.category_id}')
+        tags.add(f'feed:author:{instance.author_id}')
+        before = getattr(instance, '_feed_fields_before', None) or {}
+        if before.get('category_id'):
+            tags.add(f'feed:category:{before["category_id"]}')
+        if before.get('author_id'):
+            tags.add(f'feed:author:{before["author_id"]}')
+    purge_pages_on_commit(*tags)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def update_post_stats(sender, instance, update_fields=None, **kwargs):
+    """
+    Переносит вклад поста в сводки категории и автора, если пост
+    появился, исчез или сменил категорию, автора или дату.
+    """
+    if kwargs.get('raw'):
+        return
+    current = {field: getattr(instance, field) for field in stats.POST_FIELDS}
+    if kwargs.get('signal') is post_delete:
+        stats.move_posts(removed=[current])
+        return
+    if not feed_fields_changed(sender, instance):
+        return
+    before = getattr(instance, '_feed_fields_before', None)
+    if before and update_fields and 'comment_count' not in update_fields:
+        # Счётчик в памяти мог устареть, в базе остался прежний.
+        current['comment_count'] = before['comment_count']
+    stats.move_posts(removed=[before] if before else [], added=[current])
+
+
+@receiver(post_save, sender=Post)
+def update_post_timeline(sender, instance, **kwargs):
+    """
+    Пост входит в общую ленту или выходит из неё. Удалённый пост
+    теряет запись сам, по каскаду внешнего ключа.
+    """
+    if kwargs.get('raw'):
+        return
+    if feed_fields_changed(sender, instance):
+        timeline.sync(Post.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Category)
+def update_category_timeline(sender, instance, created, **kwargs):
+    """Скрытие и открытие категории меняет ленту целиком."""
+    if kwargs.get('raw'):
+        return
+    if not created and feed_fields_changed(sender, instance):
+        timeline.sync(Post.objects.filter(category=instance))
+
+
+@receiver(pre_delete, sender=Category)
+def remove_category_timeline(sender, instance, **kwargs):
+    """Посты удалённой категории остаются без неё и выходят из ленты."""
+    TimelineEntry.objects.filter(post__category=instance).delete()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_pages(sender, instance, **kwargs):
+    """Комментарий меняет счётчик в карточке и страницу поста."""
+    if kwargs.get('raw') or deleted_with_post(instance):
+        return
+    purge_pages_on_commit(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def purge_category_pages(sender, instance, **kwargs):
+    """Скрытие категории меняет состав общей ленты."""
+    if kwargs.get('raw'):
+        return
+    tags = {
+        'categories', f'category:{instance.pk}',
+        f'feed:category:{instance.pk}',
+    }
+    if kwargs.get('signal') is pre_delete or feed_fields_changed(
+        sender, instance
+    ):
+        tags.add('feed:index')
+    purge_pages_on_commit(*tags)
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def purge_location_pages(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    purge_pages_on_commit(f'location:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+def purge_author_pages(sender, instance, created,
+                       update_fields=None, **kwargs):
+    """Имя автора выводится в карточках и комментариях."""
+    if kwargs.get('raw'):
+        return
+    if created or (update_fields and 'username' not in update_fields):
+        return
+    purge_pages_on_commit(f'author:{instance.pk}')
+
+
+@receiver(posts_published)
+def purge_published_pages(sender, posts, **kwargs):
+    """Открытые посты попадают в общую ленту и ленты категорий и авторов."""
+    tags = {'feed:index'}
+    for pk, category_id, author_id in posts.values_list(
+        'pk', 'category_id', 'author_id'
+    ):
+        tags.add(f'post:{pk}')
+        tags.add(f'feed:category:{category_id}')
+        tags.add(f'feed:author:{author_id}')
+    purge_pages_on_commit(*tags)
+    invalidate_post_cards(posts)
+    forget_next_publication()
+    stats.move_posts(added=posts.values(*stats.POST_FIELDS))
+    timeline.sync(posts)
+
+
+@receiver(post_save, sender=Post)
+def queue_image_variants(sender, instance, **kwargs):
+    """
+    Копии изображения готовятся в фоне, вне обработки запроса.
+    Копии заменённого изображения удаляет сама подготовка новых.
+    """
+    if kwargs.get('raw'):
+        return
+    if needs_variants(instance):
+        schedule_variants(instance)
+    elif not instance.image:
+        remove_variants(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_image_variants(sender, instance, **kwargs):
+    remove_variants(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    search.index_posts([instance])
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    search.index_comments([instance])
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def unindex(sender, instance, **kwargs):
+    if sender is Comment and deleted_with_post(instance):
+        return
+    search.remove('post' if sender is Post else 'comment', instance.pk)
+
+
+@receiver(connection_created)
+def prepare_connection(sender, connection, **kwargs):
+    """
+    Настраивает каждое новое соединение: PRAGMA для SQLite
+    и учёт времени SQL.
+    """
+    database.configure_sqlite(connection)
+    metrics.instrument_connection(connection)
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    database.check_connections()
+
+
+@receiver(request_started)
+def reset_post_delete(sender, **kwargs):
+    """Пометка удаления, оборванного ошибкой, не переходит в новый запрос."""
+    deleting_posts.set(frozenset())
@@ -0,0 +1,167 @@
+import gzip
+import mimetypes
+import os
+from dataclasses import dataclass
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+
+from .constants import (
+    STATIC_COMPRESS_EXTENSIONS, STATIC_MAX_AGE, STATIC_MIN_SAVING,
+    STATIC_UNHASHED_MAX_AGE
+)
+
+try:
+    import brotli
+except ImportError:
+    # Без пакета brotli готовятся только копии .gz.
+    brotli = None
+
+
+def _gzip(data: bytes) -> bytes:
+    # mtime=0 - одинаковый файл при каждом collectstatic.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+# Кодировки сжатых копий в порядке предпочтения при отдаче:
+# (значение Content-Encoding, суффикс файла, функция сжатия).
+ENCODINGS: tuple = (
+    (('br', '.br', lambda data: brotli.compress(data, quality=11)),)
+    if brotli is not None else ()
+) + (
+    ('gzip', '.gz', _gzip),
+)
+COMPRESSED_SUFFIXES = tuple(suffix for _, suffix, _ in ENCODINGS)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage, который после расстановки хешей
+    кладёт рядом с текстовыми файлами сжатые копии .br и .gz:
+    сервер отдаёт их готовыми, не сжимая файл на каждый запрос.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(paths) | set(self.hashed_files.values())):
+            for compressed_name in self.compress(name):
+                yield name, compressed_name, True
+
+    def compress(self, name: str):
+        """Создаёт сжатые копии файла, имена созданных копий."""
+        if not name.endswith(STATIC_COMPRESS_EXTENSIONS):
+            return
+        with self.open(name) as source:
+            data = source.read()
+        for _, suffix, compress in ENCODINGS:
+            compressed = compress(data)
+            if len(compressed) > len(data) * (1 - STATIC_MIN_SAVING):
+                continue
+            target = name + suffix
+            if self.exists(target):
+                self.delete(target)
+            yield self.save(target, ContentFile(compressed))
+
+
+@dataclass
+class Variant:
+    """Файл на диске, которым можно ответить на запрос статики."""
+
+    encoding: str
+    path: str
+    size: int
+    etag: str
+
+
+@dataclass
+class StaticFile:
+    """Файл из STATIC_ROOT с готовыми заголовками ответа."""
+
+    content_type: str
+    cache_control: str
+    # Сжатые копии в порядке предпочтения, последний - оригинал.
+    variants: tuple
+
+    def choose(self, accept_encoding: str) -> Variant:
+        accepted = {
+            token.split(';')[0].strip()
+            for token in accept_encoding.split(',')
+        }
+        for variant in self.variants[:-1]:
+            if variant.encoding in accepted:
+                return variant
+        return self.variants[-1]
+
+
+def _variant(encoding: str, path: str) -> Variant:
+    stat = os.stat(path)
+    return Variant(
+        encoding, path, stat.st_size,
+        f'"{stat.st_size:x}-{int(stat.st_mtime):x}-{encoding}"'
+    )
+
+
+def build_index(root) -> dict:
+    """
+    Описания всех файлов STATIC_ROOT по имени относительно корня.
+    Собирается один раз при запуске: запрос к статике стоит
+    одного поиска в словаре и открытия файла.
+    """
+    if not root or not os.path.isdir(root):
+        return {}
+    hashed = set(
+        ManifestStaticFilesStorage(location=root).load_manifest().values()
+    )
+    index = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            if filename.endswith(COMPRESSED_SUFFIXES) and os.path.exists(
+                os.path.splitext(path)[0]
+            ):
+                continue
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            variants = tuple(
+                _variant(encoding, path + suffix)
+                for encoding, suffix, _ in ENCODINGS
+                if os.path.exists(path + suffix)
+            ) + (_variant('identity', path),)
+            content_type, _ = mimetypes.guess_type(filename)
+            index[name] = StaticFile(
+                content_type=content_type or 'application/octet-stream',
+                cache_control=(
+                    f'public, max-age={STATIC_MAX_AGE}, immutable'
+                    if name in hashed
+                    else f'public, max-age={STATIC_UNHASHED_MAX_AGE}'
+                ),
+                variants=variants,
+            )
+    return index
+
+
+def serve(request, static_file: StaticFile):
+    """Ответ на GET или HEAD к файлу статики."""
+    variant = static_file.choose(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    if variant.etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    elif request.method == 'HEAD':
+        response = HttpResponse()
+        response['Content-Length'] = variant.size
+    else:
+        response = FileResponse(open(variant.path, 'rb'))
+        del response['Content-Disposition']
+    if response.status_code != HttpResponseNotModified.status_code:
+        response['Content-Type'] = static_file.content_type
+    response['Cache-Control'] = static_file.cache_control
+    response['ETag'] = variant.etag
+    response['X-Content-Type-Options'] = 'nosniff'
+    if len(static_file.variants) > 1:
+        response['Vary'] = 'Accept-Encoding'
+    if variant.encoding != 'identity':
+        response['Content-Encoding'] = variant.encoding
+    return response
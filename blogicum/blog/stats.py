@@ -0,0 +1,190 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, DateTimeField, F, Max, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .cache import purge_pages_on_commit
+from .models import AuthorStats, CategoryStats, Post
+
+# Модель сводки и поле поста, по которому она группируется.
+STATS_KEYS = {
+    CategoryStats: 'category_id',
+    AuthorStats: 'author_id',
+}
+# Префикс тега кэша страниц, на которых выведена сводка:
+# страница категории и профиль автора.
+STATS_TAGS = {
+    CategoryStats: 'category',
+    AuthorStats: 'author',
+}
+# Поля поста, от которых зависит его вклад в сводки.
+POST_FIELDS = (
+    'is_published', 'is_scheduled', 'pub_date', 'category_id', 'author_id',
+    'comment_count',
+)
+
+
+def _aggregate(key: str, ids=None):
+    """Сводка опубликованных постов по значениям поля key."""
+    # Посты без категории в сводку категорий не попадают.
+    posts = Post.objects.published().exclude(**{key: None})
+    if ids is not None:
+        posts = posts.filter(**{f'{key}__in': ids})
+    return posts.order_by().values(key).annotate(
+        post_count=Count('pk'),
+        comment_count=Coalesce(Sum('comment_count'), 0),
+        last_published_at=Max('pub_date'),
+    )
+
+
+def _build(model, key: str, row: dict):
+    return model(
+        pk=row[key],
+        post_count=row['post_count'],
+        comment_count=row['comment_count'],
+        last_published_at=row['last_published_at'],
+    )
+
+
+def purge_stats_pages(model, ids) -> None:
+    """Сбрасывает после COMMIT страницы со сводками model для ids."""
+    purge_pages_on_commit(*(
+        f'{STATS_TAGS[model]}:{pk}' for pk in ids if pk is not None
+    ))
+
+
+def refresh(model, ids) -> None:
+    """
+    Пересчитывает строки сводки model для ids одним GROUP BY.
+    Недостающая строка создаётся, только если у объекта есть
+    опубликованные посты: при каскадном удалении автора или
+    категории строка не воскресает после удаления.
+    """
+    ids = {pk for pk in ids if pk is not None}
+    if not ids:
+        return
+    key = STATS_KEYS[model]
+    rows = {row[key]: row for row in _aggregate(key, ids)}
+    missing = []
+    with transaction.atomic():
+        for pk in ids:
+            row = rows.get(pk) or {
+                key: pk, 'post_count': 0, 'comment_count': 0,
+                'last_published_at': None,
+            }
+            stats = _build(model, key, row)
+            updated = model.objects.filter(pk=pk).update(
+                post_count=stats.post_count,
+                comment_count=stats.comment_count,
+                last_published_at=stats.last_published_at,
+            )
+            if not updated and stats.post_count:
+                missing.append(stats)
+        # ignore_conflicts - строку мог успеть создать соседний запрос
+        # с теми же цифрами.
+        model.objects.bulk_create(missing, ignore_conflicts=True)
+    purge_stats_pages(model, ids)
+
+
+def is_counted(post) -> bool:
+    """Входит ли пост (словарь POST_FIELDS) в сводки, как в published()."""
+    return bool(post) and post['is_published'] and not post['is_scheduled']
+
+
+def _group(posts, key: str) -> dict:
+    """
+    Вклад постов в сводки по значениям key:
+    {id: [постов, комментариев, самая поздняя pub_date]}.
+    """
+    groups = defaultdict(lambda: [0, 0, None])
+    for post in posts:
+        if not is_counted(post) or post[key] is None:
+            continue
+        group = groups[post[key]]
+        group[0] += 1
+        group[1] += post['comment_count']
+        group[2] = max(filter(None, (group[2], post['pub_date'])))
+    return groups
+
+
+def move_posts(removed=(), added=()) -> None:
+    """
+    Вычитает из сводок вклад постов removed и добавляет вклад added
+    (словари POST_FIELDS до и после изменения; неопубликованные
+    пропускаются). Счётчики сдвигаются через F() без пересчёта.
+    GROUP BY по постам выполняется только для строки, у которой
+    снят самый новый пост (новая last_published_at неизвестна),
+    которой ещё нет или которая разошлась со сдвигом.
+    """
+    removed, added = list(removed), list(added)
+    for model, key in STATS_KEYS.items():
+        recount = set()
+        touched = set()
+        for pk, (posts, comments, newest) in _group(removed, key).items():
+            touched.add(pk)
+            updated = model.objects.filter(
+                pk=pk, last_published_at__gt=newest,
+                post_count__gte=posts, comment_count__gte=comments,
+            ).update(
+                post_count=F('post_count') - posts,
+                comment_count=F('comment_count') - comments,
+            )
+            if not updated:
+                recount.add(pk)
+        for pk, (posts, comments, newest) in _group(added, key).items():
+            touched.add(pk)
+            if pk in recount:
+                continue
+            newest = Value(newest, output_field=DateTimeField())
+            updated = model.objects.filter(pk=pk).update(
+                post_count=F('post_count') + posts,
+                comment_count=F('comment_count') + comments,
+                last_published_at=Greatest(
+                    Coalesce('last_published_at', newest), newest
+                ),
+            )
+            if not updated:
+                recount.add(pk)
+        refresh(model, recount)
+        purge_stats_pages(model, touched - recount)
+
+
+def refresh_posts(pairs) -> None:
+    """
+    Пересчитывает сводки по парам (category_id, author_id) постов
+    целиком - для исправления расхождений, а не на каждое сохранение.
+    """
+    pairs = list(pairs)
+    refresh(CategoryStats, (category_id for category_id, _ in pairs))
+    refresh(AuthorStats, (author_id for _, author_id in pairs))
+
+
+def add_comments(post_id: int, delta: int) -> None:
+    """
+    Сдвигает comment_count сводок категории и автора поста на delta.
+    Комментарии неопубликованных постов в сводку не входят.
+    """
+    keys = Post.objects.published().filter(pk=post_id).values(
+        *STATS_KEYS.values()
+    ).first()
+    if keys is None:
+        return
+    for model, key in STATS_KEYS.items():
+        rows = model.objects.filter(pk=keys[key])
+        if delta < 0:
+            rows = rows.filter(comment_count__gte=-delta)
+        rows.update(comment_count=F('comment_count') + delta)
+        purge_stats_pages(model, (keys[key],))
+
+
+def rebuild() -> int:
+    """Заново заполняет обе сводки. Возвращает число строк."""
+    total = 0
+    with transaction.atomic():
+        for model, key in STATS_KEYS.items():
+            model.objects.all().delete()
+            objects = [_build(model, key, row) for row in _aggregate(key)]
+            model.objects.bulk_create(objects, batch_size=1000)
+            total += len(objects)
+    return total
@@ -0,0 +1,18 @@
+from django import template
+
+from ..constants import PAGINATION_WINDOW
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page_obj, on_each_side=PAGINATION_WINDOW, on_ends=1):
+    """
+    Номера страниц для ссылок: первые и последние on_ends страниц
+    и on_each_side страниц по обе стороны от текущей. Пропуски
+    обозначены Paginator.ELLIPSIS. Число ссылок не зависит
+    от числа страниц ленты.
+    """
+    return list(page_obj.paginator.get_elided_page_range(
+        page_obj.number, on_each_side=on_each_side, on_ends=on_ends
+    ))
@@ -0,0 +1,24 @@
+from django import template
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, sizes='300px'):
+    """
+    Выводит изображение поста со srcset из уменьшенных копий.
+    Пока копии не готовы, выводится оригинал.
+    """
+    storage = post.image.storage
+    variants = []
+    if post.image_variants.get('source') == post.image.name:
+        variants = [
+            (width, storage.url(name))
+            for width, name in post.image_variants['variants']
+        ]
+    return {
+        'original_url': post.image.url,
+        'src': variants[0][1] if variants else post.image.url,
+        'srcset': ', '.join(f'{url} {width}w' for width, url in variants),
+        'sizes': sizes,
+    }
@@ -0,0 +1,60 @@
+from django.db import transaction
+
+from .models import Post, TimelineEntry
+
+
+def visible(posts):
+    """Посты из posts, которые должны быть в общей ленте."""
+    return Post.objects.is_category_published().filter(
+        pk__in=posts.values('pk')
+    )
+
+
+def sync(posts) -> None:
+    """
+    Приводит записи ленты постов из QuerySet posts к их текущему
+    состоянию: видимые посты получают запись с актуальной датой,
+    остальные её теряют.
+    """
+    with transaction.atomic():
+        TimelineEntry.objects.filter(post__in=posts.values('pk')).delete()
+        TimelineEntry.objects.bulk_create([
+            TimelineEntry(post_id=pk, pub_date=pub_date)
+            for pk, pub_date in visible(posts).values_list('pk', 'pub_date')
+        ], batch_size=1000)
+
+
+def rebuild() -> int:
+    """Заново заполняет ленту из PostManager. Возвращает число записей."""
+    with transaction.atomic():
+        TimelineEntry.objects.all().delete()
+        entries = [
+            TimelineEntry(post_id=pk, pub_date=pub_date)
+            for pk, pub_date in Post.objects.is_category_published(
+            ).values_list('pk', 'pub_date').iterator()
+        ]
+        TimelineEntry.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
+
+
+def diff() -> dict:
+    """
+    Сравнивает ленту с живой выборкой is_category_published():
+    {'missing': [...], 'extra': [...], 'wrong_date': [...]} - id постов.
+    """
+    expected = dict(
+        Post.objects.is_category_published().values_list(
+            'pk', 'pub_date'
+        ).iterator()
+    )
+    actual = dict(
+        TimelineEntry.objects.values_list('post_id', 'pub_date').iterator()
+    )
+    return {
+        'missing': sorted(expected.keys() - actual.keys()),
+        'extra': sorted(actual.keys() - expected.keys()),
+        'wrong_date': sorted(
+            pk for pk in expected.keys() & actual.keys()
+            if expected[pk] != actual[pk]
+        ),
+    }
@@ -11,6 +11,13 @@ urlpatterns: list = [
         views.PostDetailView.as_view(),
         name='post_detail'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.CommentListView.as_view(),
+        name='post_comments'
+    ),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
     path(
         'category/<slug:category_slug>/',
         views.CategoryListView.as_view(),
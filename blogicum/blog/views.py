@@ -1,22 +1,33 @@
+from http import HTTPStatus
 from typing import Any
 
 from django.db.models.base import Model as Model
 from django.shortcuts import get_object_or_404, redirect
-from django.http import Http404
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.views.generic import (
-    CreateView, UpdateView, DeleteView, ListView, DetailView
+    CreateView, UpdateView, DeleteView, ListView, DetailView, TemplateView,
+    View
 )
 from django.urls import reverse_lazy, reverse
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import UserPassesTestMixin, LoginRequiredMixin
-from django.db.models import Count
-from django.core.paginator import Paginator
-from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 
 
-from .models import Post, Category, Comment
+from . import metrics
+from .comment_buffer import comment_buffer
+from .cache import (
+    add_cache_headers, cached_page_response, get_cached_page,
+    post_cache_tags, store_page
+)
+from .models import Post, Category, Comment, TimelineEntry
 from .forms import CommentsForm, PostForm
-from .constants import PAGINATION_COUNT
+from .constants import (
+    COMMENTS_PAGE_SIZE, PAGINATION_COUNT, SEARCH_MAX_PAGE
+)
+from .paginators import CachedCountPaginator, KeysetPaginator
+from .search import search_post_ids, snippet
 
 
 User = get_user_model()
@@ -37,7 +48,8 @@ class OnlyAuthorMixin(UserPassesTestMixin):
 
     def test_func(self):
         object = self.get_object()
-        return object.author == self.request.user
+        # Сравниваем id, чтобы не загружать автора отдельным запросом.
+        return object.author_id == self.request.user.pk
 
 
 class OnlyUsernameMixin(UserPassesTestMixin):
@@ -52,12 +64,92 @@ class OnlyUsernameMixin(UserPassesTestMixin):
 
 
 class PaginateMixin:
-    """Миксина - добавляет пагинацию в некоторые CBV функции."""
+    """
+    Миксина - добавляет пагинацию в некоторые CBV функции.
+    По умолчанию лента листается курсором (?cursor=), старые ссылки
+    вида ?page=N обслуживаются обычным Paginator.
+    """
 
     paginate_by = PAGINATION_COUNT
+    page_kwarg = 'page'
+    cursor_kwarg = 'cursor'
+    count_cache_tags: tuple = ()
+
+    def get_count_cache_tags(self) -> set:
+        """
+        Теги, сброс которых меняет число постов ленты: до него
+        число для номерных страниц берётся из кэша.
+        """
+        return set(self.count_cache_tags)
+
+    def paginate_posts(self, queryset):
+        """Возвращает пару (paginator, page_obj) для переданных постов."""
+        page_number = self.request.GET.get(self.page_kwarg)
+        if page_number is not None:
+            paginator = CachedCountPaginator(
+                queryset, self.paginate_by,
+                tags=self.get_count_cache_tags()
+            )
+            return paginator, paginator.get_page(page_number)
+        paginator = KeysetPaginator(queryset, self.paginate_by)
+        return paginator, paginator.get_page(
+            self.request.GET.get(self.cursor_kwarg)
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page = self.paginate_posts(queryset)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class AnonymousPageCacheMixin:
+    """
+    Миксина - отдаёт анонимным читателям страницу из кэша pages
+    с поддержкой ETag и Last-Modified. Залогиненные пользователи
+    кэш обходят: им выводятся элементы управления автора.
+    """
+
+    page_cache_tags: tuple = ()
+
+    def get_page_cache_tags(self, context) -> set:
+        """Теги страницы - по ним signals.py сбрасывает кэш."""
+        tags = set(self.page_cache_tags)
+        posts = list(context.get('page_obj') or ())
+        if context.get('post') is not None:
+            posts.append(context['post'])
+        for post in posts:
+            tags |= post_cache_tags(post)
+        return tags
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+        ):
+            return super().dispatch(request, *args, **kwargs)
+        entry = get_cached_page(request)
+        if entry is not None:
+            return self.add_page_cache_headers(
+                cached_page_response(request, entry), entry
+            )
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == HTTPStatus.OK and hasattr(
+            response, 'context_data'
+        ):
+            tags = self.get_page_cache_tags(response.context_data)
+            response.add_post_render_callback(
+                lambda rendered: self.add_page_cache_headers(
+                    rendered, store_page(request, rendered, tags)
+                )
+            )
+        return response
+
+    def add_page_cache_headers(self, response, entry):
+        add_cache_headers(response, entry)
+        patch_vary_headers(response, ('Cookie',))
+        return response
 
 
-class PostListView(PaginateMixin, ListView):
+class PostListView(AnonymousPageCacheMixin, PaginateMixin, ListView):
     """
     Главная страница.
     Показывает 10 публикаций на 1-й странице.
@@ -65,19 +157,33 @@ class PostListView(PaginateMixin, ListView):
 
     model = Post
     template_name = 'blog/index.html'
-    queryset = (
-        Post.objects.is_category_published(
-        ).select_related(
-            'category', 'location', 'author'
-        ).annotate(
-            comment_count=Count('comments')
-        ).order_by(
-            '-pub_date'
+    context_object_name = 'post_list'
+    page_cache_tags = ('feed:index',)
+    count_cache_tags = ('feed:index',)
+    # Лента читается из готовой таблицы TimelineEntry: фильтры
+    # публикации уже применены, сортировка - по её индексу.
+    queryset = TimelineEntry.objects.select_related(
+        'post__category', 'post__location', 'post__author'
+    )
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page, entries, has_other_pages = (
+            super().paginate_queryset(queryset, page_size)
         )
+        # Карточкам нужны посты, а не записи ленты.
+        page.object_list = [entry.post for entry in entries]
+        return paginator, page, page.object_list, has_other_pages
+
+
+def comments_paginator(comments) -> KeysetPaginator:
+    """Комментарии поста от старых к новым порциями COMMENTS_PAGE_SIZE."""
+    return KeysetPaginator(
+        comments, COMMENTS_PAGE_SIZE, date_field='created_at',
+        descending=False,
     )
 
 
-class PostDetailView(DetailView):
+class PostDetailView(AnonymousPageCacheMixin, DetailView):
     """Показывает страничку отдельного поста."""
 
     model = Post
@@ -88,7 +194,9 @@ class PostDetailView(DetailView):
 
         # Получаем пост без учета даты публикации и доступности категории
         post = get_object_or_404(
-            self.model.objects.select_related('category'),
+            self.model.objects.select_related(
+                'category', 'location', 'author'
+            ),
             pk=post_id
         )
 
@@ -97,11 +205,11 @@ class PostDetailView(DetailView):
         if not post.is_published or (
             post.category and not post.category.is_published
         ):
-            if post.author != self.request.user:
+            if post.author_id != self.request.user.pk:
                 raise Http404('Публикация не найдена')
 
-        # Проверяем дату публикации, ошибки не будет если автор
-        if post.pub_date > timezone.now() and post.author != self.request.user:
+        # Отложенный пост до публикации виден только автору.
+        if post.is_scheduled and post.author_id != self.request.user.pk:
             raise Http404('Публикация не найдена')
 
         return post
@@ -113,13 +221,48 @@ class PostDetailView(DetailView):
         """
         context = super().get_context_data(**kwargs)
         context['form'] = CommentsForm()
-        context['comments'] = (
-            self.object.comments.select_related('author')
+        # ?cursor= - порция с только что оставленным комментарием.
+        context['comments'] = self.get_comments_page(
+            self.request.GET.get('cursor')
         )
         return context
 
+    def get_comments_page(self, cursor=None):
+        """
+        Порция комментариев по курсору от старых к новым.
+        Первая выводится на странице поста, остальные подгружает
+        CommentListView, так что размер страницы не зависит
+        от числа комментариев.
+        """
+        return comments_paginator(
+            self.object.comments.select_related('author')
+        ).get_page(cursor)
+
+    def get_page_cache_tags(self, context) -> set:
+        """Кроме поста, страница зависит от авторов комментариев."""
+        return super().get_page_cache_tags(context) | {
+            f'author:{comment.author_id}' for comment in context['comments']
+        }
+
+
+class CommentListView(PostDetailView):
+    """
+    HTML-фрагмент со следующей порцией комментариев поста.
+    Права доступа к посту те же, что у PostDetailView.
+    """
 
-class CategoryListView(PaginateMixin, ListView):
+    template_name = 'includes/comment_list.html'
+
+    def get_context_data(self, **kwargs):
+        return {
+            'post': self.object,
+            'comments': self.get_comments_page(
+                self.request.GET.get('cursor')
+            ),
+        }
+
+
+class CategoryListView(AnonymousPageCacheMixin, PaginateMixin, ListView):
     """Показывает все посты для каждой категории"""
 
     model = Category
@@ -128,20 +271,29 @@ class CategoryListView(PaginateMixin, ListView):
 
     def get_queryset(self):
         """Переопределяем метод, прописывая свой запрос."""
+        # Сводка категории приходит тем же запросом.
         self.category = get_object_or_404(
-            Category,
+            Category.objects.select_related('stats'),
             slug=self.kwargs['category_slug'],
             is_published=True
         )
         return (
-            Post.objects.published(
-            ).filter(
-                category=self.category
-            ).annotate(
-                comment_count=Count('comments')
+            Post.objects.get_by_category(
+                self.category
+            ).select_related(
+                'category', 'location', 'author'
             ).order_by('-pub_date')
         )
 
+    def get_count_cache_tags(self) -> set:
+        return {f'feed:category:{self.category.pk}'}
+
+    def get_page_cache_tags(self, context) -> set:
+        return super().get_page_cache_tags(context) | {
+            f'feed:category:{self.category.pk}',
+            f'category:{self.category.pk}',
+        }
+
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         """Добавляем в словарь context доп. ключ - category."""
         context = super().get_context_data(**kwargs)
@@ -149,6 +301,41 @@ class CategoryListView(PaginateMixin, ListView):
         return context
 
 
+class SearchView(TemplateView):
+    """Поиск по заголовкам и текстам постов и по комментариям."""
+
+    template_name = 'blog/search.html'
+    paginate_by = PAGINATION_COUNT
+
+    def get_page_number(self) -> int:
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            return 1
+        return min(max(1, page), SEARCH_MAX_PAGE)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        page = self.get_page_number()
+        ids = search_post_ids(
+            query, self.paginate_by + 1, (page - 1) * self.paginate_by
+        ) if query else []
+        posts = Post.objects.select_related(
+            'category', 'location', 'author'
+        ).in_bulk(ids[:self.paginate_by])
+        context.update(
+            query=query,
+            page=page,
+            has_next=len(ids) > self.paginate_by and page < SEARCH_MAX_PAGE,
+            results=[
+                (posts[pk], snippet(posts[pk].text, query))
+                for pk in ids[:self.paginate_by] if pk in posts
+            ],
+        )
+        return context
+
+
 class PostCreateView(LoginRequiredMixin, CreateView):
     """CBV - страничка для создания нового поста."""
 
@@ -157,13 +344,9 @@ class PostCreateView(LoginRequiredMixin, CreateView):
     template_name = 'blog/create.html'
 
     def form_valid(self, form):
-        # Связываем пост с текущим пользователем
-        # и устанавливаем флаг публикации.
+        # Связываем пост с текущим пользователем. Пост с датой
+        # в будущем помечается отложенным при сохранении (signals.py).
         form.instance.author = self.request.user
-        if form.instance.pub_date > timezone.now():
-            form.instance.is_published = False
-        else:
-            form.instance.is_published = True
         return super().form_valid(form)
 
     def get_success_url(self) -> str:
@@ -208,13 +391,39 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         на создание комментария и Номер Поста из URL.
         """
         form.instance.author = self.request.user
-        form.instance.post = get_object_or_404(Post, id=self.kwargs['post_id'])
-        return super().form_valid(form)
+        form.instance.post = get_object_or_404(
+            Post.objects.only('id'), id=self.kwargs['post_id']
+        )
+        if not settings.COMMENT_WRITE_BUFFER:
+            return super().form_valid(form)
+        # Комментарий пишется пачкой вместе с соседними запросами;
+        # ждём записи, чтобы автор увидел его после редиректа.
+        try:
+            saved = comment_buffer.save(form.instance)
+        except Post.DoesNotExist:
+            raise Http404('Публикация удалена')
+        if not saved:
+            # Очередь не успела - пишем сами, как без буфера.
+            return super().form_valid(form)
+        self.object = form.instance
+        return HttpResponseRedirect(self.get_success_url())
 
     def get_success_url(self):
-        return reverse(
+        """
+        Порция комментариев, которая заканчивается новым: при длинной
+        ветке первая страница его не содержит, и автор не увидел бы
+        свою запись.
+        """
+        url = reverse(
             'blog:post_detail', kwargs={'post_id': self.kwargs['post_id']}
         )
+        comment = self.object
+        cursor = comments_paginator(
+            Comment.objects.filter(post_id=comment.post_id)
+        ).cursor_ending_with(comment)
+        if cursor is not None:
+            url += f'?cursor={cursor}'
+        return f'{url}#comment_{comment.pk}'
 
 
 class CommentUpdateView(OnlyAuthorMixin, UpdateView):
@@ -261,28 +470,29 @@ class UserDetailView(PaginateMixin, DetailView):
 
     def get_object(self, queryset=None) -> Model:
         username = self.kwargs['username']
-        return get_object_or_404(self.model, username=username)
+        # Сводка автора приходит тем же запросом.
+        return get_object_or_404(
+            self.model.objects.select_related('stats'), username=username
+        )
+
+    def get_count_cache_tags(self) -> set:
+        return {f'feed:author:{self.object.pk}'}
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        profile = self.get_object()
+        # get_object() уже вызван в get(), повторно профиль не запрашиваем.
+        profile = self.object
         # Получаем посты автора.
-        if self.request.user == profile:
+        if self.request.user.pk == profile.pk:
             # Если пользователь - автор, показываем все посты.
             posts = Post.objects.filter(author=profile)
         else:
             # Иначе показываем только опубликованные.
-            posts = Post.objects.filter(author=profile, is_published=True)
-        context['posts'] = posts.order_by(
-            '-pub_date'
-        ).annotate(
-            comment_count=Count('comments')
-        )
-        paginator = Paginator(context['posts'], self.paginate_by)
-        page_number = self.request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
-
-        context['page_obj'] = page_obj
+            posts = Post.objects.published().filter(author=profile)
+        context['posts'] = posts.select_related(
+            'category', 'location', 'author'
+        ).order_by('-pub_date')
+        _, context['page_obj'] = self.paginate_posts(context['posts'])
         return context
 
 
@@ -301,3 +511,25 @@ class UserUpdateView(OnlyUsernameMixin, UpdateView):
         return reverse(
             'blog:profile', kwargs={'username': self.kwargs['username']}
         )
+
+
+class MetricsView(View):
+    """
+    Счётчики PerformanceMiddleware по представлениям.
+    По умолчанию - в текстовом формате Prometheus, с ?format=json -
+    в JSON. Доступна только с адресов из INTERNAL_IPS.
+    """
+
+    def get(self, request):
+        if request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+            raise Http404
+        snapshot = metrics.registry.snapshot()
+        if request.GET.get('format') == 'json':
+            return HttpResponse(
+                metrics.render_json(snapshot),
+                content_type='application/json'
+            )
+        return HttpResponse(
+            metrics.render_prometheus(snapshot),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
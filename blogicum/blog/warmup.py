@@ -0,0 +1,42 @@
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+
+def preload_templates() -> int:
+    """
+    Разбирает все шаблоны из каталогов DIRS движка Django.
+    С кэширующим загрузчиком разобранные шаблоны остаются в памяти,
+    и первые запросы воркера не читают и не разбирают файлы.
+    Возвращает число загруженных шаблонов.
+    """
+    engine = engines['django']
+    count = 0
+    for directory in engine.engine.dirs:
+        directory = Path(directory)
+        for path in sorted(directory.rglob('*.html')):
+            name = path.relative_to(directory).as_posix()
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError:
+                logger.exception('Шаблон %s не разобран.', name)
+                continue
+            count += 1
+    return count
+
+
+def warm_up() -> None:
+    """Подготовка воркера до первого запроса, вызывается из wsgi/asgi."""
+    if not settings.TEMPLATE_PRELOAD:
+        return
+    started = time.perf_counter()
+    count = preload_templates()
+    logger.info(
+        'Разобрано шаблонов: %d за %.1f мс',
+        count, (time.perf_counter() - started) * 1000
+    )
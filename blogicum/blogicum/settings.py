@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 
@@ -12,6 +13,11 @@ ALLOWED_HOSTS: list = [
     '127.0.0.1',
 ]
 
+# Адреса, которым открыта страница /metrics/.
+INTERNAL_IPS: list = [
+    '127.0.0.1',
+]
+
 INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'blog.apps.BlogConfig',
@@ -26,6 +32,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Статика отдаётся раньше всех слоёв и в метрики не попадает.
+    'blog.middleware.StaticFilesMiddleware',
+    # Первым, чтобы учитывать время всех остальных слоёв.
+    'blog.middleware.PerformanceMiddleware',
+    # До сессий: их чтение тоже идёт через роутер.
+    'blog.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -43,12 +55,28 @@ STATICFILES_DIRS: list = [
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
+TEMPLATE_LOADERS: list = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Разобранные шаблоны хранятся в памяти процесса. Без DEBUG включено
+# по умолчанию; в разработке правки шаблонов тогда видны после
+# перезапуска сервера.
+if os.getenv('TEMPLATE_CACHE', '0' if DEBUG else '1') == '1':
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
+# Разобрать все шаблоны из TEMPLATES_DIR при запуске воркера
+# (blogicum/wsgi.py, blogicum/asgi.py), а не на первых запросах.
+TEMPLATE_PRELOAD = os.getenv('TEMPLATE_PRELOAD') == '1'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -61,13 +89,129 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Async-представления ленты, поста, категории и профиля под ASGI.
+# Выключены по умолчанию: в Django 3.2 без асинхронных ORM и кэша
+# они не быстрее sync-представлений (см. benchmark_asgi).
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS') == '1'
+
+# База данных задаётся окружением. По умолчанию - файл SQLite,
+# DB_ENGINE=postgresql включает PostgreSQL (нужен psycopg2).
+# DB_CONN_MAX_AGE - сколько секунд держать соединение между запросами.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite3')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'blogicum'),
+            'USER': os.getenv('POSTGRES_USER', 'blogicum'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        }
+    }
+
+# Реплики для чтения: DB_REPLICAS - через запятую пути к файлам
+# SQLite или хосты PostgreSQL. Каждая становится алиасом replicaN,
+# чтение туда направляет blog.routers.ReplicaRouter.
+DATABASE_REPLICAS: list = []
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST' if DB_ENGINE == 'postgresql' else 'NAME': replica.strip(),
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS: list = ['blog.routers.ReplicaRouter']
+
+# Проверять перед запросом, что сохранённое соединение живо
+# (аналог CONN_HEALTH_CHECKS из Django 4.1), см. blog/database.py.
+DB_HEALTH_CHECKS = os.getenv('DB_HEALTH_CHECKS', '1') == '1'
+
+# PRAGMA, выполняемые на каждом новом соединении с SQLite.
+# WAL позволяет читать во время записи, busy_timeout (мс) - ждать
+# освобождения блокировки вместо ошибки "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(64 * 1024 * 1024))),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),
+}
+
+# Кэши: default - общий, fragments - отрендеренные карточки постов,
+# pages - целые страницы для анонимных пользователей.
+# Бэкенд фрагментов задаётся окружением, например
+# django.core.cache.backends.filebased.FileBasedCache
+# или django.core.cache.backends.memcached.PyMemcacheCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'fragments': {
+        'BACKEND': os.getenv(
+            'FRAGMENT_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('FRAGMENT_CACHE_LOCATION', 'fragments'),
+        'TIMEOUT': None,
+    },
+    # Готовые страницы лент для анонимных читателей.
+    'pages': {
+        'BACKEND': os.getenv(
+            'PAGE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('PAGE_CACHE_LOCATION', 'pages'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Сессии (SESSION_MODE=cached_db) и пользователи сессий
+    # (AUTH_USER_CACHE=1). При нескольких процессах сервера нужен
+    # общий кэш: локальный кэш процесса не узнает о выходе
+    # пользователя или смене пароля в соседнем процессе.
+    'sessions': {
+        'BACKEND': os.getenv(
+            'SESSION_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('SESSION_CACHE_LOCATION', 'sessions'),
+    },
 }
 
+# Где хранятся сессии: db - таблица, cached_db - кэш sessions
+# с записью в таблицу, signed_cookies - подписанная cookie без
+# обращений к базе и кэшу.
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.'
+    + os.getenv('SESSION_MODE', 'db')
+)
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Комментарии пишутся пачками фоновым потоком (blog/comment_buffer.py).
+COMMENT_WRITE_BUFFER = os.getenv('COMMENT_WRITE_BUFFER') == '1'
+
+# Пользователь сессии из кэша sessions вместо SELECT на каждый запрос.
+AUTHENTICATION_BACKENDS: list = (
+    ['blog.backends.CachedModelBackend']
+    if os.getenv('AUTH_USER_CACHE') == '1' else []
+) + [
+    # Сессии, созданные до включения кэша, продолжают работать.
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -96,7 +240,15 @@ USE_L10N = False
 USE_TZ = True
 
 
-STATIC_URL = '/static_develop/'
+STATIC_URL = '/static/'
+
+# Сюда collectstatic собирает статику с хешами в именах и сжатыми
+# копиями; отдаёт её StaticFilesMiddleware или веб-сервер.
+STATIC_ROOT = Path(os.getenv('STATIC_ROOT', BASE_DIR / 'static'))
+
+STATICFILES_STORAGE = (
+    'blog.staticfiles.CompressedManifestStaticFilesStorage'
+)
 
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -114,3 +266,18 @@ MEDIA_ROOT = BASE_DIR / 'media'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # Указываем директорию, в которую будут сохраняться файлы писем:
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+# Медленные запросы (blog/metrics.py) и итоги прогрева воркера
+# (blog/warmup.py) пишем в консоль.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'blog.metrics': {'handlers': ['console'], 'level': 'WARNING'},
+        'blog.images': {'handlers': ['console'], 'level': 'WARNING'},
+        'blog.warmup': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
@@ -8,7 +8,14 @@ from django.contrib.auth.forms import UserCreationForm
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', include('blog.urls', namespace='blog')),
+    path(
+        '',
+        include(
+            'blog.async_urls' if settings.ASYNC_READ_VIEWS else 'blog.urls',
+            namespace='blog'
+        )
+    ),
+    path('api/', include('blog.api_urls', namespace='api')),
     path('pages/', include('pages.urls', namespace='pages')),
     path('auth/', include('django.contrib.auth.urls')),
     path(
@@ -5,3 +5,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
 application = get_wsgi_application()
+
+# Модули блога импортируют модели и настройки - только после
+# get_wsgi_application(), когда Django уже настроен.
+from blog.warmup import warm_up  # noqa: E402
+
+warm_up()
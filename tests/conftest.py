@@ -0,0 +1,150 @@
+from datetime import timedelta
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from blog.comment_buffer import comment_buffer
+from blog.constants import PAGINATION_COUNT
+from blog.models import Category, Comment, Location, Post
+
+# Максимальное число SQL-запросов на одну страницу для анонимного
+# пользователя - на каждый маршрут из blog/urls.py, проверяется
+# фикстурой query_budget. Залогиненному пользователю добавляются
+# запросы сессии и пользователя.
+QUERY_BUDGETS: dict = {
+    'blog:index': 2,
+    'blog:post_detail': 2,
+    'blog:post_comments': 2,
+    'blog:search': 2,
+    'blog:metrics': 0,
+    'blog:category_posts': 2,
+    'blog:profile': 2,
+    'blog:create_post': 2,
+    'blog:edit_post': 3,
+    'blog:delete_post': 2,
+    'blog:add_comment': 1,
+    'blog:edit_comment': 4,
+    'blog:delete_comment': 2,
+    'blog:edit_profile': 2,
+}
+AUTH_QUERY_OVERHEAD: int = 2
+
+
+def pytest_generate_tests(metafunc):
+    """Тест с аргументом budget_name запускается на каждый маршрут."""
+    if 'budget_name' in metafunc.fixturenames:
+        metafunc.parametrize('budget_name', sorted(QUERY_BUDGETS))
+
+
+@pytest.fixture(scope='session')
+def query_budgets() -> dict:
+    return QUERY_BUDGETS
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(
+    django_db_modify_db_settings_parallel_suffix, tmp_path_factory
+):
+    """
+    Тестовая база SQLite - файл, а не общая память: тестам
+    с потоками нужны независимые соединения с WAL и busy_timeout,
+    как у сервера. В общей памяти SQLite сразу отвечает
+    "database table is locked".
+    """
+    database = settings.DATABASES['default']
+    if database['ENGINE'] == 'django.db.backends.sqlite3':
+        database.setdefault('TEST', {})['NAME'] = str(
+            tmp_path_factory.mktemp('db') / 'test.sqlite3'
+        )
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Кэши страниц, карточек и сессий не переходят между тестами."""
+    yield
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture
+def buffered_comments(settings):
+    """
+    Комментарии пишутся через comment_buffer. Поток записи
+    останавливается вместе с тестом, пока база ещё доступна.
+    """
+    settings.COMMENT_WRITE_BUFFER = True
+    yield comment_buffer
+    comment_buffer.drain()
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.create_user(
+        username='author', password='password'
+    )
+
+
+@pytest.fixture
+def author_client(client, author):
+    client.force_login(author)
+    return client
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(
+        title='Путешествия', description='Заметки из поездок',
+        slug='travel'
+    )
+
+
+@pytest.fixture
+def location():
+    return Location.objects.create(name='Москва')
+
+
+@pytest.fixture
+def posts(author, category, location):
+    """Лента длиннее одной страницы, посты с разными датами."""
+    now = timezone.now()
+    return [
+        Post.objects.create(
+            title=f'Пост {number}', text=f'Текст поста {number}',
+            pub_date=now - timedelta(hours=number), author=author,
+            category=category, location=location
+        )
+        for number in range(PAGINATION_COUNT + 1)
+    ]
+
+
+@pytest.fixture
+def post(posts):
+    return posts[0]
+
+
+@pytest.fixture
+def comments(post, author):
+    return [
+        Comment.objects.create(post=post, author=author, text=f'Ответ {n}')
+        for n in range(3)
+    ]
+
+
+@pytest.fixture
+def query_budget(django_assert_max_num_queries):
+    """
+    Проверка бюджета запросов страницы из QUERY_BUDGETS:
+
+        with query_budget('blog:index'):
+            client.get(url)
+
+    authenticated=True добавляет запросы сессии и пользователя.
+    """
+    def check(name: str, authenticated: bool = False):
+        limit = QUERY_BUDGETS[name]
+        if authenticated:
+            limit += AUTH_QUERY_OVERHEAD
+        return django_assert_max_num_queries(limit)
+    return check
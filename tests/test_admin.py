@@ -0,0 +1,50 @@
+import pytest
+from django.urls import reverse
+
+from blog.admin import CommentAdmin
+from blog.models import Comment
+
+
+@pytest.mark.django_db
+def test_comment_text_is_editable_in_list(admin_client, comments):
+    """Текст комментария правится прямо в списке админки."""
+    response = admin_client.get(reverse('admin:blog_comment_changelist'))
+    assert response.status_code == 200
+    assert 'form-0-text' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_comment_list_saves_text(admin_client, comments):
+    comment = comments[0]
+    data = {
+        'form-TOTAL_FORMS': 1, 'form-INITIAL_FORMS': 1,
+        'form-0-id': comment.pk, 'form-0-text': 'Исправлено',
+        '_save': 'Сохранить',
+    }
+    admin_client.post(reverse('admin:blog_comment_changelist'), data)
+    comment.refresh_from_db()
+    assert comment.text == 'Исправлено'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('page', (3, 6, 50))
+def test_estimated_count_past_data(admin_client, post, author, monkeypatch,
+                                   page):
+    """
+    Оценка MAX(pk) после удалений больше числа строк: страницы за
+    концом данных пустые, а не редирект ?e=1, и ссылок дальше нет.
+    """
+    monkeypatch.setattr('blog.paginators.ADMIN_EXACT_COUNT_LIMIT', 0)
+    monkeypatch.setattr(CommentAdmin, 'list_per_page', 5)
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, text=f'{n}') for n in range(30)
+    )
+    Comment.objects.filter(
+        pk__in=Comment.objects.order_by('pk').values('pk')[:20]
+    ).delete()
+    url = reverse('admin:blog_comment_changelist')
+    assert admin_client.get(url).context['cl'].paginator.num_pages == 6
+    response = admin_client.get(url, {'p': page})
+    assert response.status_code == 200
+    assert not response.context['cl'].result_list
+    assert response.context['cl'].paginator.num_pages == 2
@@ -0,0 +1,21 @@
+import pytest
+from django.urls import reverse
+
+from blog.api import ApiView
+
+
+def test_api_view_requires_get_data():
+    with pytest.raises(TypeError):
+        ApiView()
+
+
+@pytest.mark.django_db
+def test_comments_follow_author_rename(
+    client, post, comments, author, django_capture_on_commit_callbacks
+):
+    url = reverse('api:post_comments', args=[post.pk])
+    assert client.get(url).json()['results'][0]['author'] == 'author'
+    with django_capture_on_commit_callbacks(execute=True):
+        author.username = 'renamed'
+        author.save()
+    assert client.get(url).json()['results'][0]['author'] == 'renamed'
@@ -0,0 +1,48 @@
+import pytest
+from django.db import DEFAULT_DB_ALIAS, IntegrityError
+
+from blog.bulk_data import load_fixture
+from blog.models import Category, Comment
+
+
+def fixture_objects(post_id: int) -> list:
+    return [
+        {
+            'model': 'blog.category', 'pk': 100,
+            'fields': {
+                'title': 'Из фикстуры', 'description': 'Описание',
+                'slug': 'fixture', 'is_published': True,
+                'created_at': '2024-01-01T00:00:00Z',
+            },
+        },
+        {
+            'model': 'blog.comment', 'pk': 100,
+            'fields': {
+                'text': 'Комментарий', 'post': post_id, 'author': 1,
+                'created_at': '2024-01-01T00:00:00Z',
+            },
+        },
+    ]
+
+
+# Проверка ключей должна пройти до настоящего COMMIT, а не внутри
+# транзакции теста.
+@pytest.mark.django_db(transaction=True)
+def test_broken_foreign_key_leaves_no_rows():
+    """Нарушение внешнего ключа откатывает всю загрузку, пачки тоже."""
+    with pytest.raises(IntegrityError):
+        load_fixture(
+            fixture_objects(post_id=999), batch_size=1,
+            using=DEFAULT_DB_ALIAS
+        )
+    assert not Category.objects.filter(pk=100).exists()
+    assert not Comment.objects.filter(pk=100).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_fixture_is_loaded(post, author):
+    objects = fixture_objects(post_id=post.pk)
+    objects[1]['fields']['author'] = author.pk
+    counts = load_fixture(objects, batch_size=1, using=DEFAULT_DB_ALIAS)
+    assert counts == {Category: 1, Comment: 1}
+    assert Comment.objects.filter(pk=100, post=post).exists()
@@ -0,0 +1,30 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+from blog.models import CategoryStats, Post
+
+
+@pytest.mark.django_db
+def test_reconcile_refreshes_cached_counts(
+    post, comments, django_capture_on_commit_callbacks
+):
+    """Исправленный счётчик виден в карточке, на странице и в сводке."""
+    Post.objects.filter(pk=post.pk).update(comment_count=100)
+    CategoryStats.objects.filter(pk=post.category_id).update(
+        comment_count=100
+    )
+    client = Client()
+    url = reverse('blog:category_posts', args=[post.category.slug])
+    assert 'Комментарии (100)' in client.get(url).content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('reconcile_comment_counts', stdout=StringIO())
+    content = client.get(url).content.decode()
+    assert f'Комментарии ({len(comments)})' in content
+    assert f'Комментариев: {len(comments)}' in content
+    assert CategoryStats.objects.get(
+        pk=post.category_id
+    ).comment_count == len(comments)
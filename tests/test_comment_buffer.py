@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from blog.comment_buffer import STOP, CommentBuffer, PendingComment
+from blog.constants import COMMENTS_PAGE_SIZE
+from blog.models import Comment, Post
+
+
+def pending_comment(post, author, text='Комментарий') -> PendingComment:
+    return PendingComment(Comment(post=post, author=author, text=text))
+
+
+@pytest.mark.django_db
+def test_deleted_post_fails_only_its_comment(posts, author):
+    """Пост удалён, пока комментарий ждал: остальная пачка пишется."""
+    alive = pending_comment(posts[0], author)
+    orphan = pending_comment(posts[1], author)
+    posts[1].delete()
+    CommentBuffer().flush([alive, orphan])
+    assert alive.error is None and alive.comment.pk is not None
+    assert isinstance(orphan.error, Post.DoesNotExist)
+    assert list(Comment.objects.all()) == [alive.comment]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_deleted_post_gives_404(author_client, post, buffered_comments):
+    url = reverse('blog:add_comment', args=[post.pk])
+    post.delete()
+    response = author_client.post(url, {'text': 'Поздно'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+# Поток записи закрывает соединение - нужна настоящая транзакция.
+@pytest.mark.django_db(transaction=True)
+def test_timed_out_comment_is_not_written_twice(post, author, monkeypatch):
+    """Снятый с очереди по таймауту комментарий очередь не пишет."""
+    buffer = CommentBuffer()
+    monkeypatch.setattr(buffer, '_ensure_flusher', lambda: None)
+    comment = Comment(post=post, author=author, text='Долго')
+    assert buffer.save(comment, timeout=0.01) is False
+    buffer.queue.put(STOP)
+    buffer._run()
+    assert not Comment.objects.exists()
+
+
+@pytest.mark.django_db
+def test_view_saves_comment_on_timeout(
+    author_client, post, buffered_comments, monkeypatch
+):
+    """Очередь не успела - представление сохраняет комментарий само."""
+    monkeypatch.setattr(buffered_comments, 'save', lambda comment: False)
+    response = author_client.post(
+        reverse('blog:add_comment', args=[post.pk]), {'text': 'Напрямую'}
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert Comment.objects.get().text == 'Напрямую'
+    post.refresh_from_db()
+    assert post.comment_count == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_drain_writes_queued_comments(post, author):
+    """При остановке процесса очередь дописывается, а не теряется."""
+    buffer = CommentBuffer()
+    for number in range(5):
+        buffer.submit(Comment(post=post, author=author, text=f'{number}'))
+    buffer.drain()
+    assert Comment.objects.count() == 5
+    assert not buffer._thread.is_alive()
+
+
+def check_redirect_to_new_comment(client, post, author):
+    """После отправки автор попадает на порцию со своим комментарием."""
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, text=f'Старый {n}')
+        for n in range(COMMENTS_PAGE_SIZE + 5)
+    )
+    response = client.post(
+        reverse('blog:add_comment', args=[post.pk]), {'text': 'Новый'}
+    )
+    comment = Comment.objects.get(text='Новый')
+    assert response.url.endswith(f'#comment_{comment.pk}')
+    page = client.get(response.url).context['comments']
+    assert list(page)[-1] == comment
+    assert len(page) == COMMENTS_PAGE_SIZE and page.has_previous()
+
+
+@pytest.mark.django_db
+def test_redirect_shows_new_comment_in_long_thread(
+    author_client, post, author
+):
+    check_redirect_to_new_comment(author_client, post, author)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_buffered_redirect_shows_new_comment(
+    author_client, post, author, buffered_comments
+):
+    check_redirect_to_new_comment(author_client, post, author)
+
+
+@pytest.mark.django_db
+def test_redirect_to_first_page_in_short_thread(author_client, post):
+    response = author_client.post(
+        reverse('blog:add_comment', args=[post.pk]), {'text': 'Новый'}
+    )
+    comment = Comment.objects.get()
+    assert response.url == reverse(
+        'blog:post_detail', args=[post.pk]
+    ) + f'#comment_{comment.pk}'
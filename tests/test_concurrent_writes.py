@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+from django.db import OperationalError, connection
+from django.test import Client
+from django.urls import reverse
+
+from blog.models import Comment
+
+THREADS = 8
+PER_THREAD = 10
+
+
+def post_comments(post, author) -> list:
+    """Отправляет PER_THREAD комментариев, возвращает ошибки."""
+    client = Client()
+    url = reverse('blog:add_comment', args=[post.pk])
+    errors = []
+    try:
+        # Вход тоже пишет в базу - сессию.
+        client.force_login(author)
+        for number in range(PER_THREAD):
+            response = client.post(url, {'text': f'Комментарий {number}'})
+            if response.status_code != HTTPStatus.FOUND:
+                errors.append(f'ответ {response.status_code}')
+    except OperationalError as error:
+        errors.append(str(error))
+    finally:
+        # У каждого потока своё соединение - закрываем его.
+        connection.close()
+    return errors
+
+
+# Потоки пишут через свои соединения: данные теста должны быть
+# в базе, а не в незакрытой транзакции.
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('buffered', (False, True))
+def test_concurrent_comments_are_saved(request, post, author, buffered):
+    """
+    Комментарии из нескольких потоков сохраняются все, без
+    "database is locked", и счётчик поста сходится с их числом.
+    buffered - запись пачками через comment_buffer.
+    """
+    if buffered:
+        request.getfixturevalue('buffered_comments')
+    with ThreadPoolExecutor(THREADS) as executor:
+        errors = [
+            error
+            for chunk in executor.map(
+                lambda _: post_comments(post, author), range(THREADS)
+            )
+            for error in chunk
+        ]
+    assert errors == []
+    assert Comment.objects.filter(post=post).count() == THREADS * PER_THREAD
+    post.refresh_from_db()
+    assert post.comment_count == THREADS * PER_THREAD
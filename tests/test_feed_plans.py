@@ -0,0 +1,68 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Признаки плохого плана в выводе EXPLAIN QUERY PLAN у SQLite:
+# полный проход по таблице (SCAN без USING INDEX) и отдельная
+# сортировка. Проход по индексу в нужном порядке допустим.
+SQLITE_BAD_PLAN = re.compile(r'SCAN blog_\w+$|USE TEMP B-TREE', re.MULTILINE)
+
+
+def explain(sql: str) -> str:
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return '\n'.join(row[-1] for row in cursor.fetchall())
+
+
+@pytest.fixture
+def feed_urls(post, comments):
+    return {
+        'blog:index': reverse('blog:index'),
+        'blog:category_posts': reverse(
+            'blog:category_posts', args=[post.category.slug]
+        ),
+        'blog:profile': reverse('blog:profile', args=[post.author.username]),
+        'blog:post_detail': reverse('blog:post_detail', args=[post.pk]),
+    }
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Шаблон плана написан для SQLite.'
+)
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'name',
+    ('blog:index', 'blog:category_posts', 'blog:profile', 'blog:post_detail')
+)
+def test_feed_queries_use_indexes(client, feed_urls, name):
+    """
+    Все запросы, которые страница выполняет на самом деле,
+    идут по индексам: без полного прохода по таблице блога
+    и без сортировки во временном B-дереве.
+    """
+    with CaptureQueriesContext(connection) as queries:
+        client.get(feed_urls[name])
+    plans = {
+        query['sql']: explain(query['sql'])
+        for query in queries.captured_queries
+        if query['sql'].startswith('SELECT')
+    }
+    assert plans, f'{name} не выполнила ни одного запроса.'
+    bad = {sql: plan for sql, plan in plans.items()
+           if SQLITE_BAD_PLAN.search(plan)}
+    assert not bad, f'Запросы {name} без индекса: {bad}'
+
+
+@pytest.mark.django_db
+def test_index_reads_timeline(client, posts):
+    """Главная лента читается из TimelineEntry, а не фильтром по постам."""
+    with CaptureQueriesContext(connection) as queries:
+        client.get(reverse('blog:index'))
+    feed = [
+        query['sql'] for query in queries.captured_queries
+        if 'ORDER BY' in query['sql']
+    ]
+    assert feed and all('blog_timelineentry' in sql for sql in feed)
@@ -0,0 +1,75 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.images import build_variants
+
+
+def image_file(name: str) -> SimpleUploadedFile:
+    buffer = BytesIO()
+    Image.new('RGB', (800, 600), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@pytest.fixture
+def image_post(post, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    post.image = image_file('photo.png')
+    post.save()
+    assert build_variants(post.pk)
+    post.refresh_from_db()
+    return post
+
+
+def variant_files(post) -> list:
+    storage = post.image.storage
+    return [name for _, name in post.image_variants['variants']
+            if storage.exists(name)]
+
+
+@pytest.mark.django_db
+def test_rebuild_deletes_old_variants(image_post):
+    old = variant_files(image_post)
+    assert old
+    assert build_variants(image_post.pk, force=True)
+    image_post.refresh_from_db()
+    assert not set(old) & set(variant_files(image_post))
+    assert not any(image_post.image.storage.exists(name) for name in old)
+
+
+@pytest.mark.django_db
+def test_replaced_image_deletes_old_variants(image_post):
+    old = variant_files(image_post)
+    image_post.image = image_file('other.png')
+    image_post.save()
+    assert build_variants(image_post.pk)
+    assert not any(image_post.image.storage.exists(name) for name in old)
+
+
+@pytest.mark.django_db
+def test_removed_image_deletes_variants(
+    image_post, django_capture_on_commit_callbacks
+):
+    old = variant_files(image_post)
+    with django_capture_on_commit_callbacks(execute=True):
+        image_post.image = ''
+        image_post.save()
+    image_post.refresh_from_db()
+    assert image_post.image_variants == {}
+    assert not any(image_post.image.storage.exists(name) for name in old)
+
+
+# Команда готовит копии в потоках: данные должны быть в базе,
+# а не в незакрытой транзакции теста.
+@pytest.mark.django_db(transaction=True)
+def test_missing_source_is_skipped(image_post, posts):
+    image_post.image.storage.delete(image_post.image.name)
+    other = posts[1]
+    other.image = image_file('second.png')
+    other.save()
+    call_command('generate_image_variants', '--force', stdout=StringIO())
+    other.refresh_from_db()
+    assert variant_files(other)
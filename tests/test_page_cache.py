@@ -0,0 +1,81 @@
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from blog.models import Post
+
+
+@pytest.mark.django_db
+def test_post_pages_purged_after_commit(
+    client, post, django_capture_on_commit_callbacks
+):
+    """
+    Правка поста сбрасывает кэш страниц только после COMMIT:
+    запрос внутри транзакции получает прежнюю страницу.
+    """
+    url = reverse('blog:post_detail', args=[post.pk])
+    assert post.title in client.get(url).content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        post.title = 'Новый заголовок'
+        post.save()
+        assert 'Новый заголовок' not in client.get(url).content.decode()
+    assert 'Новый заголовок' in client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_comment_refreshes_cached_card(
+    author_client, post, django_capture_on_commit_callbacks
+):
+    """Новый комментарий меняет счётчик в карточке на главной."""
+    client = Client()
+    url = reverse('blog:add_comment', args=[post.pk])
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(url, {'text': 'Первый'})
+    assert 'Комментарии (1)' in client.get(
+        reverse('blog:index')
+    ).content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(url, {'text': 'Второй'})
+    assert 'Комментарии (2)' in client.get(
+        reverse('blog:index')
+    ).content.decode()
+
+
+@pytest.mark.django_db
+def test_comment_refreshes_category_stats(
+    author_client, posts, django_capture_on_commit_callbacks
+):
+    """
+    Сводка на закэшированной странице категории видит комментарий
+    и к посту, которого на этой странице нет.
+    """
+    post = posts[-1]
+    client = Client()
+    url = reverse('blog:category_posts', args=[post.category.slug])
+    assert 'Комментариев: 0' in client.get(url).content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(
+            reverse('blog:add_comment', args=[post.pk]), {'text': 'Первый'}
+        )
+    assert 'Комментариев: 1' in client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_update_fields_save_refreshes_card(
+    client, post, django_capture_on_commit_callbacks
+):
+    """
+    save(update_fields=...) без updated_at у экземпляра, загруженного
+    до чужой правки: карточка в кэше лежит под updated_at из базы
+    и тоже сбрасывается.
+    """
+    stale = Post.objects.get(pk=post.pk)
+    with django_capture_on_commit_callbacks(execute=True):
+        post.text = 'Правка'
+        post.save()
+    url = reverse('blog:index')
+    assert post.title in client.get(url).content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        stale.title = 'Новый заголовок'
+        stale.save(update_fields=['title'])
+    assert 'Новый заголовок' in client.get(url).content.decode()
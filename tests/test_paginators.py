@@ -0,0 +1,107 @@
+import base64
+import json
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.constants import PAGINATION_COUNT
+from blog.models import Post
+from blog.paginators import KeysetPaginator
+
+
+def make_cursor(*payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+# id больше bigint: SQLite ответил бы OverflowError.
+HUGE_CURSOR = make_cursor('n', '2020-01-01T00:00:00+00:00', 10 ** 30)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'cursor', ('не-base64', make_cursor('x', 'дата', 1), HUGE_CURSOR)
+)
+@pytest.mark.parametrize(
+    'name', ('blog:index', 'blog:post_comments', 'api:posts',
+             'api:post_comments')
+)
+def test_malformed_cursor_gives_first_page(client, comments, name, cursor):
+    """Испорченный курсор - первая страница, а не 500."""
+    args = [] if name in ('blog:index', 'api:posts') else [comments[0].post_id]
+    response = client.get(reverse(name, args=args), {'cursor': cursor})
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.fixture
+def paginator(posts):
+    return KeysetPaginator(Post.objects.all(), per_page=3)
+
+
+def walk(paginator, page, direction):
+    """Страницы от page по курсорам next_cursor или previous_cursor."""
+    pages = [page]
+    while getattr(page, f'has_{direction}')():
+        page = paginator.get_page(getattr(page, f'{direction}_cursor'))
+        pages.append(page)
+    return pages
+
+
+@pytest.mark.django_db
+def test_keyset_walks_feed_both_ways(paginator, posts):
+    """Вперёд - вся лента по порядку без повторов, назад - те же страницы."""
+    forward = walk(paginator, paginator.get_page(None), 'next')
+    assert [post for page in forward for post in page] == posts
+    assert not forward[0].has_previous() and not forward[-1].has_next()
+    backward = walk(paginator, forward[-1], 'previous')
+    assert [list(page) for page in backward] == [
+        list(page) for page in reversed(forward)
+    ]
+
+
+@pytest.mark.django_db
+def test_keyset_previous_near_start_gives_first_page(paginator, posts):
+    """Назад от второй позиции ленты - полная первая страница."""
+    page = paginator.get_page(paginator.encode_cursor('p', posts[1]))
+    assert list(page) == posts[:3]
+    assert not page.has_previous()
+
+
+@pytest.mark.django_db
+def test_keyset_keeps_order_for_equal_dates(author, category):
+    """При одинаковой дате порядок задаёт id, посты не теряются."""
+    now = timezone.now() - timedelta(days=1)
+    same = [
+        Post.objects.create(
+            title=f'{n}', text='Текст', pub_date=now, author=author,
+            category=category
+        )
+        for n in range(5)
+    ]
+    paginator = KeysetPaginator(Post.objects.all(), per_page=2)
+    pages = walk(paginator, paginator.get_page(None), 'next')
+    assert [post for page in pages for post in page] == same[::-1]
+
+
+@pytest.mark.django_db
+def test_feed_uses_cursor_by_default(client, posts):
+    response = client.get(reverse('blog:index'))
+    page = response.context['page_obj']
+    assert page.is_keyset and list(page) == posts[:PAGINATION_COUNT]
+    response = client.get(
+        reverse('blog:index'), {'cursor': page.next_cursor}
+    )
+    assert list(response.context['page_obj']) == posts[PAGINATION_COUNT:]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ('blog:index', 'blog:category_posts'))
+def test_page_number_links_keep_working(client, posts, name):
+    """Старые ссылки ?page=N отдаются номерными страницами."""
+    args = [posts[0].category.slug] if name == 'blog:category_posts' else []
+    response = client.get(reverse(name, args=args), {'page': 2})
+    page = response.context['page_obj']
+    assert not getattr(page, 'is_keyset', False)
+    assert page.number == 2 and list(page) == posts[PAGINATION_COUNT:]
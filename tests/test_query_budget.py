@@ -0,0 +1,29 @@
+import pytest
+from django.urls import get_resolver
+
+from blog.benchmark import sample_urls
+from blog.cache import page_cache_timeout
+
+
+def test_every_route_has_budget(query_budgets):
+    """У каждого маршрута blog/urls.py есть бюджет запросов."""
+    names = {
+        f'blog:{name}'
+        for name in get_resolver('blog.urls').reverse_dict
+        if isinstance(name, str)
+    }
+    assert names - query_budgets.keys() == set()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('authenticated', (False, True))
+def test_page_fits_query_budget(client, comments, query_budget,
+                                budget_name, authenticated):
+    author, urls = sample_urls()
+    if authenticated:
+        client.force_login(author)
+    # Время ближайшей отложенной публикации общее для всех страниц
+    # и живёт в кэше; бюджет страницы считается без него.
+    page_cache_timeout()
+    with query_budget(budget_name, authenticated):
+        client.get(urls[budget_name])
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import HttpResponse
+from django.urls import reverse
+
+from blog import routers
+from blog.constants import REPLICA_STICKY_COOKIE
+from blog.middleware import ReplicaRoutingMiddleware
+from blog.models import Post
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+
+
+@pytest.fixture
+def routed(replicas, rf):
+    """
+    Выполняет запрос через ReplicaRoutingMiddleware и возвращает
+    (можно ли было читать реплику, ответ).
+    """
+    seen = {}
+
+    def view(request):
+        seen['use_replica'] = routers.use_replica.get()
+        return HttpResponse()
+
+    def run(request):
+        response = ReplicaRoutingMiddleware(view)(request)
+        return seen['use_replica'], response
+    return run
+
+
+def test_reads_go_to_replica(replicas):
+    router = routers.ReplicaRouter()
+    assert router.db_for_read(Post) == DEFAULT_DB_ALIAS
+    token = routers.use_replica.set(True)
+    try:
+        assert router.db_for_read(Post) == 'replica'
+        assert router.db_for_write(Post) == DEFAULT_DB_ALIAS
+    finally:
+        routers.use_replica.reset(token)
+
+
+@pytest.mark.django_db
+def test_reads_in_transaction_stay_on_primary(replicas):
+    token = routers.use_replica.set(True)
+    try:
+        with transaction.atomic():
+            assert routers.ReplicaRouter().db_for_read(
+                Post
+            ) == DEFAULT_DB_ALIAS
+    finally:
+        routers.use_replica.reset(token)
+
+
+def test_write_makes_following_reads_sticky(routed, rf):
+    """После записи чтения автора идут в основную базу, потом - в реплику."""
+    use_replica, response = routed(rf.get('/'))
+    assert use_replica and REPLICA_STICKY_COOKIE not in response.cookies
+    use_replica, response = routed(rf.post('/'))
+    assert not use_replica
+    cookie = response.cookies[REPLICA_STICKY_COOKIE].value
+    request = rf.get('/')
+    request.COOKIES[REPLICA_STICKY_COOKIE] = cookie
+    assert not routed(request)[0]
+    request.COOKIES[REPLICA_STICKY_COOKIE] = str(time.time() - 1)
+    assert routed(request)[0]
+
+
+@pytest.mark.parametrize('cookie', ('мусор', ''))
+def test_broken_cookie_is_ignored(routed, rf, cookie):
+    request = rf.get('/')
+    request.COOKIES[REPLICA_STICKY_COOKIE] = cookie
+    assert routed(request)[0]
+
+
+def test_admin_reads_primary(routed, rf):
+    assert not routed(rf.get(reverse('admin:index')))[0]
+
+
+def test_without_replicas_nothing_changes(settings, rf):
+    settings.DATABASE_REPLICAS = []
+    response = ReplicaRoutingMiddleware(lambda request: HttpResponse())(
+        rf.post('/')
+    )
+    assert REPLICA_STICKY_COOKIE not in response.cookies
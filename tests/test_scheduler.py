@@ -0,0 +1,79 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.management.commands.publish_scheduled import Command
+from blog.models import Post
+
+
+@pytest.fixture
+def scheduled(author, category):
+    """Отложенные посты, время трёх из них уже наступило."""
+    now = timezone.now()
+    posts = [
+        Post.objects.create(
+            title=f'Отложенный {n}', text='Текст', author=author,
+            category=category, pub_date=now + timedelta(days=1)
+        )
+        for n in range(4)
+    ]
+    # Время идёт мимо сигналов - как у настоящего отложенного поста.
+    Post.objects.filter(pk__in=[post.pk for post in posts[:3]]).update(
+        pub_date=now - timedelta(minutes=1)
+    )
+    return posts
+
+
+def publish(*args) -> str:
+    stdout = StringIO()
+    call_command('publish_scheduled', *args, stdout=stdout)
+    return stdout.getvalue()
+
+
+@pytest.mark.django_db
+def test_future_post_waits_for_scheduler(author, category):
+    post = Post.objects.create(
+        title='Завтра', text='Текст', author=author, category=category,
+        pub_date=timezone.now() + timedelta(hours=1)
+    )
+    assert post.is_scheduled
+    assert not Post.objects.published().filter(pk=post.pk).exists()
+
+
+@pytest.mark.django_db
+def test_publishes_due_posts_in_batches(scheduled):
+    """Открываются только наступившие посты, пачками по --batch-size."""
+    assert 'Опубликовано постов: 3' in publish('--batch-size', '2')
+    assert list(
+        Post.objects.filter(is_scheduled=True).values_list('pk', flat=True)
+    ) == [scheduled[3].pk]
+    assert publish() == ''
+
+
+@pytest.mark.django_db
+def test_published_posts_appear_in_cached_feed(
+    scheduled, django_capture_on_commit_callbacks
+):
+    """Открытие постов сбрасывает закэшированную ленту."""
+    client = Client()
+    url = reverse('blog:index')
+    assert 'Отложенный 0' not in client.get(url).content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        publish()
+    assert 'Отложенный 0' in client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_worker_sleeps_until_next_publication(scheduled):
+    publish()
+    # До оставшегося поста сутки - спим не дольше --max-sleep.
+    assert Command().get_sleep(60) == 60
+    Post.objects.filter(pk=scheduled[3].pk).update(
+        pub_date=timezone.now() + timedelta(seconds=30)
+    )
+    assert 25 < Command().get_sleep(60) <= 30
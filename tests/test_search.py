@@ -0,0 +1,50 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from blog.constants import SEARCH_MAX_PAGE
+from blog.models import Comment
+from blog.search import search_post_ids
+
+
+@pytest.mark.django_db
+def test_search_returns_only_visible_posts(posts, category, author):
+    visible, hidden, other = posts[:3]
+    for post in (visible, hidden, other):
+        post.text = 'Поездка на озеро'
+        post.save()
+    hidden.is_published = False
+    hidden.save()
+    Comment.objects.create(post=posts[3], author=author, text='озёра')
+    assert set(search_post_ids('озеро', 10)) == {
+        visible.pk, other.pk, posts[3].pk
+    }
+    category.is_published = False
+    category.save()
+    assert search_post_ids('озеро', 10) == []
+
+
+@pytest.mark.django_db
+def test_search_paginates_after_visibility(posts):
+    for post in posts:
+        post.text = 'Горы'
+        post.save()
+    posts[0].is_published = False
+    posts[0].save()
+    first = search_post_ids('горы', 5)
+    rest = search_post_ids('горы', 100, offset=5)
+    assert len(first) == 5
+    assert len(first) + len(rest) == len(posts) - 1
+    assert posts[0].pk not in first + rest
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'page', ('9999999999999999999999999', '-5', 'abc', '9' * 5000)
+)
+def test_search_page_number_is_clamped(client, posts, page):
+    """Номер страницы из URL не доводит OFFSET до OverflowError."""
+    response = client.get(reverse('blog:search'), {'q': 'Пост', 'page': page})
+    assert response.status_code == HTTPStatus.OK
+    assert 1 <= response.context['page'] <= SEARCH_MAX_PAGE
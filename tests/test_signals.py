@@ -0,0 +1,41 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog import search
+from blog.models import Comment
+
+
+def delete_queries(post, author, comment_count: int) -> int:
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, text=f'Ответ {n}')
+        for n in range(comment_count)
+    )
+    with CaptureQueriesContext(connection) as queries:
+        post.delete()
+    return len(queries)
+
+
+@pytest.mark.django_db
+def test_post_delete_cost_does_not_grow_with_comments(posts, author):
+    """Комментарии каскада не пересчитывают счётчики по одному."""
+    assert delete_queries(posts[0], author, 2) == delete_queries(
+        posts[1], author, 40
+    )
+
+
+@pytest.mark.django_db
+def test_post_delete_removes_comments_from_search(post, comments):
+    post.delete()
+    assert search.search_post_ids('Ответ', limit=10) == []
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {search.SEARCH_TABLE} '
+                       'WHERE post_id = %s', [post.pk])
+        assert cursor.fetchone()[0] == 0
+
+
+@pytest.mark.django_db
+def test_comment_delete_still_decrements(post, comments):
+    comments[0].delete()
+    post.refresh_from_db()
+    assert post.comment_count == len(comments) - 1
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import stats
+from blog.models import Category, CategoryStats, Comment, Post
+from blog.scheduler import publish_due_posts
+
+
+def assert_stats_match_recount():
+    """Сводки после сдвигов совпадают с полным пересчётом."""
+    for model, key in stats.STATS_KEYS.items():
+        expected = {
+            row[key]: (
+                row['post_count'], row['comment_count'],
+                row['last_published_at'],
+            )
+            for row in stats._aggregate(key)
+        }
+        actual = {
+            row.pk: (
+                row.post_count, row.comment_count, row.last_published_at
+            )
+            for row in model.objects.all() if row.post_count
+        }
+        assert actual == expected, model.__name__
+
+
+@pytest.fixture
+def other_category():
+    return Category.objects.create(
+        title='Горы', description='Походы', slug='mountains'
+    )
+
+
+@pytest.mark.django_db
+def test_post_changes_keep_stats_exact(posts, comments, other_category,
+                                       author):
+    post, older = posts[0], posts[5]
+    assert_stats_match_recount()
+    older.is_published = False
+    older.save()
+    assert_stats_match_recount()
+    # Самый новый пост уходит в другую категорию вместе с комментариями.
+    post.category = other_category
+    post.save()
+    assert_stats_match_recount()
+    post.pub_date -= timedelta(days=30)
+    post.save()
+    assert_stats_match_recount()
+    older.is_published = True
+    older.save()
+    Comment.objects.create(post=older, author=author, text='Ещё')
+    assert_stats_match_recount()
+    post.delete()
+    assert_stats_match_recount()
+    assert CategoryStats.objects.get(pk=other_category.pk).post_count == 0
+
+
+@pytest.mark.django_db
+def test_publish_scheduled_updates_stats(posts, author, category):
+    before = CategoryStats.objects.get(pk=category.pk).post_count
+    scheduled = Post.objects.create(
+        title='Завтра', text='Текст', author=author, category=category,
+        pub_date=timezone.now() + timedelta(days=1)
+    )
+    Post.objects.filter(pk=scheduled.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    publish_due_posts(batch_size=10)
+    assert_stats_match_recount()
+    assert CategoryStats.objects.get(pk=category.pk).post_count == before + 1
+
+
+@pytest.mark.django_db
+def test_unpublishing_older_post_does_not_recount(posts):
+    """Снятие не самого нового поста - сдвиг счётчиков без GROUP BY."""
+    older = posts[-1]
+    older.is_published = False
+    with CaptureQueriesContext(connection) as queries:
+        older.save()
+    assert not [
+        query for query in queries.captured_queries
+        if 'GROUP BY' in query['sql'] and 'stats' not in query['sql']
+        and 'blog_post' in query['sql']
+    ]
+    assert_stats_match_recount()
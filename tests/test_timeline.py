@@ -0,0 +1,84 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from blog import timeline
+from blog.models import Post, TimelineEntry
+from blog.scheduler import publish_due_posts
+
+
+def assert_in_sync():
+    """Лента совпадает с живой выборкой is_category_published()."""
+    assert timeline.diff() == {'missing': [], 'extra': [], 'wrong_date': []}
+
+
+def entry_dates() -> dict:
+    return dict(TimelineEntry.objects.values_list('post_id', 'pub_date'))
+
+
+@pytest.mark.django_db
+def test_post_changes_sync_timeline(post):
+    assert entry_dates()[post.pk] == post.pub_date
+    post.pub_date -= timedelta(days=1)
+    post.save()
+    assert entry_dates()[post.pk] == post.pub_date
+    post.is_published = False
+    post.save()
+    assert post.pk not in entry_dates()
+    post.is_published = True
+    post.save()
+    assert_in_sync()
+    post.delete()
+    assert post.pk not in entry_dates()
+    assert_in_sync()
+
+
+@pytest.mark.django_db
+def test_category_visibility_syncs_timeline(posts, category):
+    category.is_published = False
+    category.save()
+    assert entry_dates() == {}
+    category.is_published = True
+    category.save()
+    assert len(entry_dates()) == len(posts)
+    assert_in_sync()
+    category.delete()
+    assert entry_dates() == {}
+    assert_in_sync()
+
+
+@pytest.mark.django_db
+def test_scheduled_post_enters_timeline_when_published(author, category):
+    post = Post.objects.create(
+        title='Завтра', text='Текст', author=author, category=category,
+        pub_date=timezone.now() + timedelta(days=1)
+    )
+    assert post.pk not in entry_dates()
+    # Время идёт мимо сигналов - как у настоящего отложенного поста.
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    assert publish_due_posts(batch_size=10) == 1
+    assert post.pk in entry_dates()
+    assert_in_sync()
+
+
+@pytest.mark.django_db
+def test_check_timeline_reports_and_fixes_drift(posts):
+    call_command('check_timeline', stdout=StringIO())
+    TimelineEntry.objects.filter(post=posts[0]).delete()
+    with pytest.raises(CommandError):
+        call_command('check_timeline', stdout=StringIO())
+    call_command('check_timeline', '--fix', stdout=StringIO())
+    assert_in_sync()
+
+
+@pytest.mark.django_db
+def test_rebuild_timeline(posts):
+    TimelineEntry.objects.all().delete()
+    call_command('rebuild_timeline', stdout=StringIO())
+    assert len(entry_dates()) == len(posts)
+    assert_in_sync()